@@ -0,0 +1,98 @@
+"""Processed S0142 data as a hive-partitioned Parquet dataset.
+
+Files are laid out as {root}/settlement_month=YYYY-MM/bsc=PARTY/settlement_run_type=RUN/{name}.parquet, with rows
+sorted by BM unit, so that reads filtered on month, party or run type skip whole directories and reads filtered on
+settlement day or BM unit skip row groups."""
+
+import functools
+import operator
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import pyarrow
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ma.elexon.S0142 import settlement_runs
+from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+
+PARTITION_KEYS = ["settlement_month", "bsc", "settlement_run_type"]
+PARTITIONING = ds.partitioning(pyarrow.schema([(key, pyarrow.string()) for key in PARTITION_KEYS]), flavor="hive")
+ROW_GROUP_SIZE = 48 * 50  # a day of 50 BM units
+
+
+def is_dataset(root: Path) -> bool:
+    return any(root.glob("settlement_month=*"))
+
+
+def write_processed(processed: ProcessedS0142, root: Path, name: str) -> List[Tuple[Path, Path]]:
+    """Write each partition of processed to a hidden file (which dataset reads ignore) in its directory.
+
+    Returns (written, destination) path pairs, for the caller to rename once all of its output is written."""
+    df = processed.df
+    settlement_day = pd.to_datetime(df["settlement_date"].astype(str), format="%d/%m/%Y")
+    df["settlement_day"] = settlement_day.dt.date
+    df["settlement_month"] = settlement_day.dt.strftime("%Y-%m")
+    df["bm_unit_id"] = df["bm_unit_id"].astype(str)  # plain strings, which have row group statistics to filter on
+
+    written = []
+    for keys, partition in df.groupby(PARTITION_KEYS, observed=True):
+        directory = root.joinpath(*[f"{key}={value}" for key, value in zip(PARTITION_KEYS, keys)])
+        directory.mkdir(parents=True, exist_ok=True)
+        partition = partition.drop(columns=PARTITION_KEYS).sort_values(["bm_unit_id", "settlement_day"], kind="stable")
+        table = pyarrow.Table.from_pandas(partition, preserve_index=False)
+        tmp_path = directory / f".{name}.parquet.tmp"
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+        written.append((tmp_path, directory / f"{name}.parquet"))
+    return written
+
+
+def read_processed(
+    root: Path,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    bsc_party_ids: Optional[List[str]] = None,
+    settlement_run_types: Optional[List[str]] = None,
+    bm_unit_ids: Optional[List[str]] = None,
+    settlement_run: Optional[str] = None,
+) -> ProcessedS0142:
+    """Read the rows for settlement days in [start, end), of the given parties, run types and BM units.
+
+    With settlement_run, only files of the authoritative run of each day are read: the latest, or of the given run
+    type (see settlement_runs.resolve)."""
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field("settlement_month") >= start.strftime("%Y-%m"))
+        conditions.append(ds.field("settlement_day") >= start.date())
+    if end is not None:
+        conditions.append(ds.field("settlement_month") <= end.strftime("%Y-%m"))
+        conditions.append(ds.field("settlement_day") < end.date())
+    if bsc_party_ids is not None:
+        conditions.append(ds.field("bsc").isin(bsc_party_ids))
+    if settlement_run_types is not None:
+        conditions.append(ds.field("settlement_run_type").isin(settlement_run_types))
+    if bm_unit_ids is not None:
+        conditions.append(ds.field("bm_unit_id").isin(bm_unit_ids))
+
+    if settlement_run is None:
+        dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+    else:
+        files = settlement_runs.authoritative_files(list(root.glob("*/*/*/*.parquet")), settlement_run)
+        dataset = ds.dataset(
+            [str(f) for f in files], format="parquet", partitioning=PARTITIONING, partition_base_dir=str(root)
+        )
+    table = dataset.to_table(
+        columns=[*ProcessedS0142.schema, "settlement_day"],
+        filter=functools.reduce(operator.and_, conditions) if conditions else None,
+    )
+    df = table.to_pandas().sort_values(["settlement_day", "settlement_period", "bsc", "bm_unit_id"], kind="stable")
+    return ProcessedS0142(df.drop(columns="settlement_day").reset_index(drop=True))
+
+
+def read_file(path: Path) -> ProcessedS0142:
+    """One file of a dataset, with its partition columns restored"""
+    partitions = dict(part.split("=", 1) for part in path.parent.parts if "=" in part)
+    df = pq.read_table(path).to_pandas()
+    df["bsc"], df["settlement_run_type"] = partitions["bsc"], partitions["settlement_run_type"]
+    return ProcessedS0142(df[list(ProcessedS0142.schema)])
@@ -0,0 +1,133 @@
+"""What changed between two settlement runs of the same days.
+
+Rows are matched on (settlement_date, settlement_period, bm_unit_id) and compared by a fingerprint of their values, so
+only the rows that changed are materialised side by side. run_deltas() works a settlement day (and party) at a time,
+loading one pair of files at once, so a year of runs is compared in the memory of a day; DeltaSummary totals the
+changes per BM unit and per day as they are produced."""
+
+from pathlib import Path
+from typing import Generator, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from ma.elexon.S0142 import dataset, settlement_runs
+from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+from ma.utils.hashing import hash_rows
+
+KEY_COLUMNS = ["settlement_date", "settlement_period", "bm_unit_id"]
+VALUE_COLUMNS = [col for col in ProcessedS0142.schema if col not in KEY_COLUMNS and col != "settlement_run_type"]
+VOLUME_COLUMN = "bm_unit_metered_volume_mwh"
+
+ADDED, REMOVED, CHANGED = "added", "removed", "changed"
+
+
+def diff(base: pd.DataFrame, compare: pd.DataFrame) -> pd.DataFrame:
+    """The rows of two runs that differ: added in compare, removed from base, or with changed values.
+
+    Returns the key columns, change, the value columns of each run (suffixed _base and _compare; null where a row is
+    missing from that run), and the change in metered volume."""
+    fingerprints = pd.merge(
+        base[KEY_COLUMNS].assign(fingerprint=hash_rows(base[VALUE_COLUMNS]), base_row=np.arange(len(base))),
+        compare[KEY_COLUMNS].assign(fingerprint=hash_rows(compare[VALUE_COLUMNS]), compare_row=np.arange(len(compare))),
+        on=KEY_COLUMNS,
+        how="outer",
+        suffixes=("_base", "_compare"),
+        validate="one_to_one",
+    )
+    changed = fingerprints[fingerprints["fingerprint_base"] != fingerprints["fingerprint_compare"]]
+
+    def side(df: pd.DataFrame, rows: pd.Series, suffix: str) -> pd.DataFrame:
+        taken = df[VALUE_COLUMNS].reset_index(drop=True).reindex(rows.to_numpy())  # rows missing from df are null
+        return taken.set_axis(changed.index, axis=0).add_suffix(suffix)
+
+    result = pd.concat(
+        [
+            changed[KEY_COLUMNS],
+            side(base, changed["base_row"], "_base"),
+            side(compare, changed["compare_row"], "_compare"),
+        ],
+        axis=1,
+    )
+    result.insert(
+        len(KEY_COLUMNS),
+        "change",
+        np.select(
+            [changed["base_row"].isna().to_numpy(), changed["compare_row"].isna().to_numpy()],
+            [ADDED, REMOVED],
+            CHANGED,
+        ),
+    )
+    result[f"{VOLUME_COLUMN}_delta"] = result[f"{VOLUME_COLUMN}_compare"].fillna(0) - result[
+        f"{VOLUME_COLUMN}_base"
+    ].fillna(0)
+    return result.sort_values(KEY_COLUMNS, kind="stable").reset_index(drop=True)
+
+
+def _load(path: Path) -> ProcessedS0142:
+    return dataset.read_file(path) if path.suffix == ".parquet" else ProcessedS0142(path)
+
+
+def run_deltas(
+    paths: Iterable[Path], base_run: str, compare_run: str = settlement_runs.LATEST
+) -> Generator[pd.DataFrame, None, None]:
+    """diff() the base_run and compare_run of each settlement date (and party) that has both, a day at a time, in
+    date order. paths are processed S0142 files: CSVs (of any number of parties, told apart by the _{party} suffix of
+    their names), or the files of a dataset."""
+    index = settlement_runs.index_files(paths)
+    pairs = pd.merge(
+        settlement_runs.resolve(index, base_run),
+        settlement_runs.resolve(index, compare_run),
+        on=["settlement_date", "bsc"],
+        suffixes=("_base", "_compare"),
+    )
+    for base_path, compare_path in zip(pairs["path_base"], pairs["path_compare"]):
+        if base_path != compare_path:  # e.g. the latest run is the base run
+            yield diff(_load(base_path).view, _load(compare_path).view)
+
+
+class DeltaSummary:
+    """Totals of changes per BM unit and per settlement date, accumulated one diff() at a time"""
+
+    def __init__(self) -> None:
+        self._by_bmu: List[pd.DataFrame] = []
+        self._by_day: List[pd.DataFrame] = []
+
+    @staticmethod
+    def _summarise(changes: pd.DataFrame, by: str) -> pd.DataFrame:
+        return (
+            changes.assign(
+                rows_added=changes["change"] == ADDED,
+                rows_removed=changes["change"] == REMOVED,
+                rows_changed=changes["change"] == CHANGED,
+                volume_delta_mwh=changes[f"{VOLUME_COLUMN}_delta"],
+                abs_volume_delta_mwh=changes[f"{VOLUME_COLUMN}_delta"].abs(),
+            )
+            .groupby(by, observed=True)[
+                ["rows_added", "rows_removed", "rows_changed", "volume_delta_mwh", "abs_volume_delta_mwh"]
+            ]
+            .sum()
+        )
+
+    def add(self, changes: pd.DataFrame) -> pd.DataFrame:
+        """Adds changes to the totals; returns them, so that deltas can be summarised as they stream past"""
+        self._by_bmu = [self._combine([*self._by_bmu, self._summarise(changes, "bm_unit_id")])]
+        self._by_day.append(self._summarise(changes, "settlement_date"))
+        return changes
+
+    @staticmethod
+    def _combine(summaries: List[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(summaries).groupby(level=0, observed=True).sum()
+
+    def by_bmu(self) -> pd.DataFrame:
+        return (
+            self._combine(self._by_bmu).sort_values("abs_volume_delta_mwh", ascending=False)
+            if self._by_bmu
+            else pd.DataFrame()
+        )
+
+    def by_day(self) -> pd.DataFrame:
+        if not self._by_day:
+            return pd.DataFrame()
+        by_day = self._combine(self._by_day)
+        return by_day.sort_index(key=lambda dates: pd.to_datetime(dates, format="%d/%m/%Y"))
@@ -1,52 +1,29 @@
-import datetime
 import sys
 from pathlib import Path
 
-import httpx
 import pandas as pd
 
 import ma.utils.conf
 import ma.utils.io
+from ma.elexon.S0142 import downloader
 
 LOG = ma.utils.io.get_logger(__name__)
 
-API_KEY = ma.utils.conf.get_dot_env("ELEXON_API_KEY")
-BASE_URL = "https://downloads.elexonportal.co.uk/p114"
 
+def get_api_key() -> str:
+    return ma.utils.conf.get_dot_env("ELEXON_API_KEY")
 
-def download_file(filename: str, download_dir: Path) -> None:
-    local_filepath = download_dir / filename
-    if not local_filepath.is_file():
-        LOG.debug(rf"Downloading {filename}")
-        with httpx.Client() as client:
-            response = client.get(f"{BASE_URL}/download?key={API_KEY}&filename={filename}")
-            with open(local_filepath, "wb") as f:
-                f.write(response.content)
-    else:
-        LOG.debug(rf"Skipping {filename}")
 
-
-def filter_files(files: dict, pattern: str = "_SF_") -> list[str]:
-    if len(files) == 0:
-        return []
-    else:
-        return [f for f in files.keys() if pattern in f]
-
-
-def get_dict_of_files(date: pd.Timestamp) -> dict:
-    """Returns a dict with filenames as the keys"""
-    with httpx.Client() as client:
-        response = client.get(f"{BASE_URL}/list?key={API_KEY}&date={date:%Y-%m-%d}&filter=s0142")
-        response.raise_for_status()
-    return response.json()
+def __getattr__(name: str) -> str:
+    if name == "API_KEY":  # resolved on use, so that importing this module doesn't need a .env
+        return get_api_key()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def main(start_date: pd.Timestamp, end_date: pd.Timestamp, download_dir: Path) -> None:
-    date = start_date
-    while date < end_date:
-        for f in filter_files(get_dict_of_files(date)):
-            download_file(f, download_dir)
-        date += datetime.timedelta(days=1)
+    failed = downloader.download(start_date, end_date, download_dir, get_api_key())
+    if failed:
+        sys.exit(f"{len(failed)} downloads failed: {', '.join(failed)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+"""Download S0142 files from the Elexon portal concurrently.
+
+One pooled AsyncClient serves every request, with at most max_concurrency in flight and starts spaced to
+requests_per_second. Failed requests (connection errors, 429 and 5xx) are retried with exponential backoff. Files are
+streamed to a hidden .part file and renamed once complete, so a file in download_dir is always whole; a rerun skips
+those and resumes .part files where they stopped, with a Range request."""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import httpx
+import pandas as pd
+
+from ma.utils.io import get_logger
+
+LOG = get_logger(__name__)
+
+T = TypeVar("T")
+
+BASE_URL = "https://downloads.elexonportal.co.uk/p114"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Spaces the starts of requests at least 1 / per_second apart"""
+
+    def __init__(self, per_second: Optional[float]):
+        self.interval = 1 / per_second if per_second else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Downloader:
+    def __init__(
+        self,
+        api_key: str,
+        download_dir: Path,
+        base_url: str = BASE_URL,
+        max_concurrency: int = 8,
+        requests_per_second: Optional[float] = 10.0,
+        retries: int = 5,
+        backoff_s: float = 1.0,
+        timeout_s: float = 60.0,
+    ):
+        self.api_key = api_key
+        self.download_dir = download_dir
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.timeout_s = timeout_s
+        # bound to the event loop of their first use, so a Downloader runs in one loop
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(requests_per_second)
+
+    async def _with_retries(self, description: str, request: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(self.retries + 1):
+            async with self._semaphore:
+                await self._rate_limiter.wait()
+                try:
+                    return await request()
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    if isinstance(e, httpx.HTTPStatusError) and e.response.status_code not in RETRY_STATUS_CODES:
+                        raise
+                    if attempt == self.retries:
+                        raise
+                    delay = self.backoff_s * 2**attempt
+                    if isinstance(e, httpx.HTTPStatusError):
+                        retry_after = e.response.headers.get("Retry-After", "")
+                        delay = float(retry_after) if retry_after.isdigit() else delay
+                    LOG.warning(f"{description} failed ({e!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def list_files(self, client: httpx.AsyncClient, date: pd.Timestamp) -> Dict:
+        """Returns a dict with filenames as the keys"""
+
+        async def request() -> Dict:
+            response = await client.get("/list", params=dict(key=self.api_key, date=f"{date:%Y-%m-%d}", filter="s0142"))
+            response.raise_for_status()
+            return response.json() or {}
+
+        return await self._with_retries(f"Listing {date:%Y-%m-%d}", request)
+
+    async def download_file(self, client: httpx.AsyncClient, filename: str) -> Path:
+        local_filepath = self.download_dir / filename
+        part_filepath = self.download_dir / f".{filename}.part"
+        if local_filepath.is_file():
+            LOG.debug(f"Skipping {filename}")
+            return local_filepath
+
+        async def request() -> None:
+            offset = part_filepath.stat().st_size if part_filepath.exists() else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            params = dict(key=self.api_key, filename=filename)
+            async with client.stream("GET", "/download", params=params, headers=headers) as response:
+                if response.status_code == 416:  # nothing left to send: the .part file is whole
+                    return
+                response.raise_for_status()
+                resumed = response.status_code == 206
+                LOG.debug(f"{'Resuming' if resumed else 'Downloading'} {filename}")
+                with open(part_filepath, "ab" if resumed else "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        f.write(chunk)
+
+        await self._with_retries(f"Downloading {filename}", request)
+        os.replace(part_filepath, local_filepath)
+        return local_filepath
+
+    async def run(self, start_date: pd.Timestamp, end_date: pd.Timestamp, pattern: str = "_SF_") -> List[str]:
+        """Download the files of days in [start_date, end_date) with pattern in their name; returns the files that
+        failed, and "listing of {date}" for each day that couldn't be listed"""
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout_s, limits=limits) as client:
+            dates = pd.date_range(start_date, end_date, inclusive="left")
+            listings = await asyncio.gather(*[self.list_files(client, date) for date in dates], return_exceptions=True)
+            failed = []
+            filenames = []
+            for date, listing in zip(dates, listings):
+                if isinstance(listing, BaseException):
+                    LOG.error(f"Listing {date:%Y-%m-%d} failed: {listing!r}")
+                    failed.append(f"listing of {date:%Y-%m-%d}")
+                else:
+                    filenames += [f for f in listing if pattern in f]
+            results = await asyncio.gather(*[self.download_file(client, f) for f in filenames], return_exceptions=True)
+
+        for filename, result in zip(filenames, results):
+            if isinstance(result, BaseException):
+                LOG.error(f"Downloading {filename} failed: {result!r}")
+                failed.append(filename)
+        return failed
+
+
+def download(
+    start_date: pd.Timestamp,
+    end_date: pd.Timestamp,
+    download_dir: Path,
+    api_key: str,
+    pattern: str = "_SF_",
+    **kwargs: Any,
+) -> List[str]:
+    """See Downloader.run; kwargs are passed to Downloader"""
+    return asyncio.run(Downloader(api_key, download_dir, **kwargs).run(start_date, end_date, pattern))
@@ -0,0 +1,121 @@
+"""Random access to the BSC party sections of gzipped S0142 files.
+
+build_index() recompresses a file with each BPH section (and the lines before the first) as a gzip member of its own,
+and records the byte range of each member in a sidecar. The result is still an ordinary gzip file, whose content is
+unchanged, but a reader that wants a few parties seeks to their members and decompresses those alone.
+
+The recompressed file's bytes differ from the input's, so it is written to a separate path (e.g. a copy of the download
+directory to process from), leaving the downloaded file as it was; rewriting the input is opt-in, with in_place."""
+
+import gzip
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from typing import BinaryIO, Dict, Generator, List, Optional
+
+from ma.utils.io import get_logger
+from ma.utils.pandas import file_stats
+
+LOG = get_logger(__name__)
+
+COMPRESSLEVEL = 6
+
+
+def index_path(filepath: Path) -> Path:
+    return filepath.with_name(filepath.name + ".index.json")
+
+
+def _write_member(output: BinaryIO, lines: List[bytes]) -> List[int]:
+    """Append lines as a gzip member; returns its [offset, length]"""
+    offset = output.tell()
+    output.write(gzip.compress(b"".join(lines), compresslevel=COMPRESSLEVEL))
+    return [offset, output.tell() - offset]
+
+
+def build_index(input_path: Path, output_path: Optional[Path] = None, in_place: bool = False) -> Path:
+    """Recompress input_path to output_path (or with in_place, over input_path itself) as one gzip member per BPH
+    section, and write the index of the members beside the output; returns the output path.
+
+    The index is {"size", "mtime_ns" of the output, "header": [offset, length], "sections": [[bsc, offset, length],
+    ...]}. Recompression changes the file's bytes, so an input recorded anywhere by size or checksum (e.g. a
+    manifest) no longer matches if rewritten in place.
+    """
+    if (output_path is None) == (not in_place):
+        raise ValueError("Give either an output_path or in_place=True")
+    output_path = input_path if output_path is None else output_path
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    header: List[int] = []
+    sections: List[list] = []
+    try:
+        with gzip.open(input_path, "rb") as file, open(tmp_path, "wb") as output:
+            lines: List[bytes] = []
+            bsc: Optional[str] = None
+            for line in file:
+                if line.startswith(b"BPH|"):
+                    if bsc is None and not sections:
+                        header = _write_member(output, lines)
+                    else:
+                        sections.append([bsc, *_write_member(output, lines)])
+                    lines, bsc = [], line.split(b"|")[8].decode()
+                lines.append(line)
+            if bsc is None:  # no sections
+                header = _write_member(output, lines)
+            else:
+                sections.append([bsc, *_write_member(output, lines)])
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+
+    size, mtime_ns = file_stats(output_path)
+    with open(index_path(output_path), "w") as f:
+        json.dump(dict(size=size, mtime_ns=mtime_ns, header=header, sections=sections), f)
+    return output_path
+
+
+def read_index(filepath: Path) -> Optional[Dict]:
+    """The index of filepath, if it has one that is up to date"""
+    try:
+        with open(index_path(filepath)) as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    if [index["size"], index["mtime_ns"]] != list(file_stats(filepath)):
+        LOG.warning(f"Ignoring the index of {filepath}, which has changed since it was indexed")
+        return None
+    return index
+
+
+def read_lines(filepath: Path, index: Dict, bsc_party_ids: List[str]) -> Generator[str, None, None]:
+    """The lines before the first BPH section, then those of the sections of the given parties, in file order"""
+    requested = set(bsc_party_ids)
+    members = [index["header"]] + [[offset, length] for bsc, offset, length in index["sections"] if bsc in requested]
+    with open(filepath, "rb") as file:
+        for offset, length in members:
+            file.seek(offset)
+            with gzip.open(io.BytesIO(file.read(length)), "rt") as member:
+                yield from member
+
+
+def main(input_dir: Path, output_dir: Optional[Path] = None) -> None:
+    """Write indexed copies of the S0142 files of input_dir to output_dir, or with no output_dir, index them in place;
+    files indexed already are skipped"""
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    for filepath in sorted(input_dir.glob("S0142*.gz")):
+        output_path = filepath if output_dir is None else output_dir / filepath.name
+        if output_path.exists() and read_index(output_path) is not None:
+            continue
+        LOG.info(f"Indexing {filepath} to {output_path}")
+        if output_dir is None:
+            build_index(filepath, in_place=True)
+        else:
+            build_index(filepath, output_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"Usage: {sys.argv[0]} input_dir (output_dir | --in-place)")
+    main(Path(sys.argv[1]), None if sys.argv[2] == "--in-place" else Path(sys.argv[2]))
@@ -0,0 +1,93 @@
+"""A record of the S0142 files processed into an output directory, kept alongside the output.
+
+One JSON line is appended per processed file, so the manifest survives crashes mid-run; a later line for the same
+file supersedes earlier ones. Whether a file needs processing, and which dates a party is missing, are then answered
+without listing or reading the output."""
+
+import json
+import os
+import re
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+import xxhash
+
+MANIFEST_FILENAME = "_manifest.jsonl"  # the leading underscore keeps it out of Parquet dataset reads
+
+FILENAME_PATTERN = re.compile(r"S0142_(?P<date>\d{8})_(?P<run_type>[A-Z0-9]+)_(?P<issued>\d{14})?")
+
+
+def file_checksum(filepath: Path, chunk_size: int = 2**20) -> str:
+    hasher = xxhash.xxh64()
+    with open(filepath, "rb") as file:
+        while chunk := file.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def parse_filename(filename: str) -> Dict[str, Optional[str]]:
+    """Settlement date (ISO) and run type from a name like S0142_20230330_SF_20230425121906.gz, if it is one"""
+    match = FILENAME_PATTERN.match(filename)
+    if match is None:
+        return dict(settlement_date=None, settlement_run_type=None)
+    return dict(
+        settlement_date=pd.Timestamp(match["date"]).date().isoformat(),
+        settlement_run_type=match["run_type"],
+    )
+
+
+class Manifest:
+    def __init__(self, directory: Path):
+        self.path = Path(directory) / MANIFEST_FILENAME
+        self.entries: Dict[str, Dict] = {}  # by input file name
+        if self.path.exists():
+            with open(self.path) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:  # e.g. a line cut short by a crash
+                        continue
+                    self.entries[entry["input"]] = entry
+
+    def is_processed(self, input_path: Path) -> bool:
+        """True if input_path was processed, and has the same contents as then: the same size, and either the same
+        modification time or, if it was touched (e.g. downloaded again), the same checksum"""
+        entry = self.entries.get(input_path.name)
+        if entry is None:
+            return False
+        stat = os.stat(input_path)
+        if entry["size"] != stat.st_size:
+            return False
+        if entry.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+        return entry.get("checksum") == file_checksum(input_path)
+
+    def record(self, entry: Dict) -> None:
+        entry = dict(entry, recorded_at=time.time())
+        with open(self.path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+        self.entries[entry["input"]] = entry
+
+    def settlement_dates(self, bsc_party_id: str, settlement_run_types: Optional[List[str]] = None) -> Set[date]:
+        """Dates for which output holds rows of the party"""
+        return {
+            date.fromisoformat(entry["settlement_date"])
+            for entry in self.entries.values()
+            if entry.get("settlement_date")
+            and entry["parties"].get(bsc_party_id)
+            and (settlement_run_types is None or entry.get("settlement_run_type") in settlement_run_types)
+        }
+
+    def missing_dates(
+        self,
+        bsc_party_id: str,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        settlement_run_types: Optional[List[str]] = None,
+    ) -> List[date]:
+        """Dates in [start, end) for which output holds no rows of the party"""
+        present = self.settlement_dates(bsc_party_id, settlement_run_types)
+        return [day.date() for day in pd.date_range(start, end, inclusive="left") if day.date() not in present]
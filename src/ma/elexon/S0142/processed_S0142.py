@@ -1,15 +1,24 @@
-import glob
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Generator, Optional, Tuple
+from typing import Any, Callable, Dict, Generator, Iterable, Optional, Sequence, Tuple
 
 import pandas as pd
 import pandera as pa
 
+from ma.elexon.S0142 import manifest
+from ma.elexon.S0142 import records as S0142_records
+from ma.elexon import settlement_calendar
 from ma.elexon.metering_data.metering_data_by_half_hour_and_bmu import MeteringDataHalfHourlyByBmu
+from ma.utils.cache import cached_transform
+from ma.utils.io import get_logger
 from ma.utils.pandas import ColumnSchema as CS
 from ma.utils.pandas import DataFrameAsset
 
+LOG = get_logger(__name__)
+
 # TODO - apply_schema() at this point
 
 COLUMN_MAP_BP7: dict[int, str] = {
@@ -33,69 +42,84 @@ COLUMN_MAP_BP7: dict[int, str] = {
 }
 
 
-def update_bsc_df_types_in_place(df: pd.DataFrame) -> None:
-    float_columns = [
-        "BM Unit Metered Volume",
-        "Period BM Unit Balancing Services Volume",
-        "Period Expected Metered Volume",
-        "Period Information Imbalance Volume",
-        "Transmission Loss Factor",
-        "Transmission Loss Multiplier",
-        "BM Unit Applicable Balancing Services Volume",
-        "Period Supplier BM Unit Delivered Volume",
-        "Period Supplier BM Unit Non BM ABSVD Volume",
-    ]
-    int_columns = ["Settlement Period"]
-
-    df[float_columns] = df[float_columns].astype(float)
-    df[int_columns] = df[int_columns].astype(int)
-
-
-def get_bsc_df(
-    S0142_df: pd.DataFrame, start_row: int, bsc_party_id: str, header: str, column_map: dict
-) -> pd.DataFrame:
-    lines = []
-    for _, line in S0142_df[start_row + 1 :].iterrows():
-        if line[0] == "SP7":
-            SP = int(line[1])
-        elif line[0] == header:  # Look for header (BP7) section
-            lines.append(line.to_list() + [SP, bsc_party_id])
-        elif line[0] == "BPH":
-            break
-
-    bsc_df = pd.DataFrame(lines, columns=list(range(len(lines[0]) - 2)) + ["Settlement Period", "BSC"])
-    # Settlement Date
-    settlement_date = str(S0142_df.loc[1, 1])
-    bsc_df["Settlement Date"] = settlement_date[6:8] + "/" + settlement_date[4:6] + "/" + settlement_date[0:4]
-    # Settlement Run Type
-    bsc_df["Settlement Run Type"] = S0142_df.loc[1, 2]
-
-    return bsc_df.rename(columns=column_map)
+FLOAT_COLUMNS_BP7 = [
+    "BM Unit Metered Volume",
+    "Period BM Unit Balancing Services Volume",
+    "Period Expected Metered Volume",
+    "Period Information Imbalance Volume",
+    "Transmission Loss Factor",
+    "Transmission Loss Multiplier",
+    "Total Trading Unit Metered Volume",
+    "BM Unit Applicable Balancing Services Volume",
+    "Period Supplier BM Unit Delivered Volume",
+    "Period Supplier BM Unit Non BM ABSVD Volume",
+]
+
+
+def parse_records(
+    records: Iterable[Sequence], bsc_party_ids: list[str]
+) -> Generator[Tuple[str, pd.DataFrame], None, None]:
+    """Parse the BP7 records of S0142 records (each a sequence of the fields of a line) in a single pass; see
+    records.extract. Yields untyped frames, as written to CSV output."""
+    for _, bsc, load in S0142_records.extract(records, ["BP7"], bsc_party_ids, typed=False):
+        assert bsc is not None and isinstance(load, pd.DataFrame)  # appease mypy
+        yield bsc, load
 
 
 def get_bsc_df_map(S0142_df: pd.DataFrame, bsc_party_ids: list[str]) -> Generator[Tuple[str, pd.DataFrame], None, None]:
-    for row_number, row in enumerate(S0142_df.iterrows()):
-        row_data = row[1]
-        if row_data[0] == "BPH":  # Look for BPH section
-            if row_data[8] in bsc_party_ids or bsc_party_ids == ["all!"]:  # Look for BSC Party
-                bsc_party_id = row_data[8]
-                bsc_df = get_bsc_df(S0142_df, row_number, bsc_party_id, "BP7", COLUMN_MAP_BP7)
-                bsc_df.reset_index(drop=True, inplace=True)
-                update_bsc_df_types_in_place(bsc_df)
-                yield bsc_party_id, bsc_df
+    yield from parse_records(S0142_df.itertuples(index=False, name=None), bsc_party_ids)
 
 
 def process_file(input_path: Path, bsc_party_ids: list[str]) -> Generator[Tuple[str, pd.DataFrame], None, None]:
-    df = pd.read_csv(
-        input_path,
-        compression="gzip",
-        header=None,
-        delimiter="|",
-        low_memory=False,
-        names=range(0, 76),
+    yield from parse_records(
+        S0142_records.read_records(input_path, [*S0142_records.SCOPE_RECORD_TYPES, "BP7"], bsc_party_ids), bsc_party_ids
     )
-    for bsc_party_id, df_final in get_bsc_df_map(df, bsc_party_ids):
-        yield bsc_party_id, df_final
+
+
+def process_and_write_file(
+    input_path: Path, output_path_prefix: str, bsc_party_ids: list[str], output_format: str = "csv"
+) -> Dict:
+    """Write each party's data to {output_path_prefix}_{bsc}.csv, or with output_format "parquet", to the partitioned
+    dataset in the directory of output_path_prefix; returns the manifest entry of input_path (see manifest.py).
+
+    Files are written aside (hidden, so not read as output) and only renamed into place once the whole input has been
+    processed, so that a failure while processing doesn't leave partial output behind. The renames aren't atomic as a
+    set: a crash part way through them leaves some of the outputs in place, but as input_path isn't then recorded in
+    the manifest, the next run reprocesses it and replaces them."""
+    from ma.elexon.S0142 import dataset
+
+    start = time.perf_counter()
+    output_dir, output_name = os.path.split(output_path_prefix)
+    entry: Dict[str, Any] = dict(
+        input=input_path.name, **manifest.parse_filename(input_path.name), parties={}, outputs=[]
+    )
+    written: list[Tuple[str | Path, str | Path]] = []  # (written aside, destination)
+    try:
+        for bsc, load in process_file(input_path, bsc_party_ids):
+            entry["parties"][bsc] = len(load)
+            entry["settlement_date"] = (
+                pd.to_datetime(load["Settlement Date"].iloc[0], format="%d/%m/%Y").date().isoformat()
+            )
+            entry["settlement_run_type"] = load["Settlement Run Type"].iloc[0]
+            if output_format == "parquet":
+                written += dataset.write_processed(ProcessedS0142(load), Path(output_dir), output_name)
+            else:
+                tmp_path = os.path.join(output_dir, f".{output_name}_{bsc}.csv.tmp")
+                load.to_csv(tmp_path, index=False)
+                written.append((tmp_path, f"{output_path_prefix}_{bsc}.csv"))
+        stat = os.stat(input_path)
+        entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+        entry["checksum"] = manifest.file_checksum(input_path)
+    except BaseException:
+        for written_path, _ in written:
+            if os.path.exists(written_path):
+                os.remove(written_path)
+        raise
+    for written_path, output_path in written:
+        os.replace(written_path, output_path)
+        entry["outputs"].append(os.path.relpath(output_path, output_dir))
+    entry["processing_s"] = time.perf_counter() - start
+    return entry
 
 
 def process_directory(
@@ -103,7 +127,18 @@ def process_directory(
     output_dir: Path,
     bsc_party_ids: list[str],
     prefixes: Optional[list[str]] = None,
-) -> None:
+    workers: int = 1,
+    output_format: str = "csv",
+    raise_on_error: bool = True,
+) -> list[Path]:
+    """Process S0142 files in input_dir that aren't in output_dir's manifest yet, using up to `workers` processes.
+
+    Output is a CSV per file and party, or with output_format "parquet", a partitioned dataset (see dataset.py).
+    Each file processed is recorded in the manifest once its output is in place. A failure is logged and the remaining
+    files processed; then an ExceptionGroup of the failures is raised, or with raise_on_error False, the input paths
+    that failed are returned."""
+    if output_format not in ("csv", "parquet"):
+        raise ValueError(f"Unknown output_format {output_format}")
     filenames = sorted(
         [
             filename
@@ -113,28 +148,62 @@ def process_directory(
             and (prefixes is None or any(filename.startswith(p) for p in prefixes))
         ]
     )
+    processed = manifest.Manifest(output_dir)
+    pending = []
     for filename in filenames:
-        input_path = os.path.join(input_dir, filename)
-        output_path_prefix = os.path.join(output_dir, filename.strip(".gz"))
-        if glob.glob(output_path_prefix + "*"):
-            print(f"Skipping {input_path}")
+        input_path = Path(os.path.join(input_dir, filename))
+        if processed.is_processed(input_path):
+            LOG.info(f"Skipping {input_path}")
         else:
-            for bsc, load in process_file(Path(input_path), bsc_party_ids):
-                if output_path_prefix:
-                    load.to_csv(
-                        output_path_prefix + "_{}.csv".format(bsc),
-                        index=False,
-                    )
+            pending.append((input_path, os.path.join(output_dir, filename.removesuffix(".gz"))))
+
+    failed: list[Path] = []
+    errors: list[Exception] = []
+
+    def report(done: int, input_path: Path, result: Callable[[], Dict]) -> None:
+        try:
+            entry = result()
+        except Exception as e:
+            LOG.error(f"[{done}/{len(pending)}] {input_path} failed: {e!r}")
+            e.add_note(f"processing {input_path}")
+            failed.append(input_path)
+            errors.append(e)
+            return
+        processed.record(entry)
+        LOG.info(f"[{done}/{len(pending)}] {input_path}: wrote {len(entry['outputs'])} files")
+
+    if workers <= 1:
+        for done, (input_path, output_path_prefix) in enumerate(pending, start=1):
+            report(
+                done,
+                input_path,
+                lambda: process_and_write_file(input_path, output_path_prefix, bsc_party_ids, output_format),
+            )
+    else:
+        # spawned rather than forked, as forking a process running pyarrow's threads can deadlock
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {
+                executor.submit(
+                    process_and_write_file, input_path, output_path_prefix, bsc_party_ids, output_format
+                ): input_path
+                for input_path, output_path_prefix in pending
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                report(done, futures[future], future.result)
+
+    if errors and raise_on_error:
+        raise ExceptionGroup(f"{len(errors)} of {len(pending)} S0142 files failed", errors)
+    return failed
 
 
 class ProcessedS0142(DataFrameAsset):
     # fmt: off
     schema: Dict[str, CS] = dict(
-        bsc                                         =CS(check=pa.Column(str)),
-        settlement_date                             =CS(check=pa.Column(str)),
-        settlement_period                           =CS(check=pa.Column(int)),
-        settlement_run_type                         =CS(check=pa.Column(str)),
-        bm_unit_id                                  =CS(check=pa.Column(str)),
+        bsc                                         =CS(check=pa.Column(str), dtype="category"),
+        settlement_date                             =CS(check=pa.Column(str), dtype="category"),
+        settlement_period                           =CS(check=pa.Column(int), dtype="int16"),
+        settlement_run_type                         =CS(check=pa.Column(str), dtype="category"),
+        bm_unit_id                                  =CS(check=pa.Column(str), dtype="category"),
         information_imbalance_cashflow              =CS(check=pa.Column(float)),
         bm_unit_period_non_delivery_charge          =CS(check=pa.Column(float)),
         period_fpn                                  =CS(check=pa.Column(float)),
@@ -146,7 +215,7 @@ class ProcessedS0142(DataFrameAsset):
         period_bm_unit_non_delivered_offer_volume   =CS(check=pa.Column(str)),
         transmission_loss_factor                    =CS(check=pa.Column(float)),
         transmission_loss_multiplier                =CS(check=pa.Column(float)),
-        trading_unit_name                           =CS(check=pa.Column(str)),
+        trading_unit_name                           =CS(check=pa.Column(str), dtype="category"),
         total_trading_unit_metered_volume           =CS(check=pa.Column(float)),
         bm_unit_applicable_balancing_services_volume=CS(check=pa.Column(float)),
         period_retailer_bm_unit_delivered_volume    =CS(check=pa.Column(float)),
@@ -156,12 +225,23 @@ class ProcessedS0142(DataFrameAsset):
     from_file_with_index = False
     from_file_skiprows = 1
 
+    @cached_transform
     def transform_to_half_hourly_by_bmu(self) -> MeteringDataHalfHourlyByBmu:
-        """Return half_hourly_by_bmu metering data"""
+        """Return half_hourly_by_bmu metering data, indexed by the start of each settlement period in naive UTC"""
         output = self.df
-        output["settlement_date"] = pd.to_datetime(output["settlement_date"], dayfirst=True)
-        output["settlement_datetime"] = output["settlement_date"] + (output["settlement_period"] - 1) * pd.Timedelta(
-            minutes=30
+        # Parsed once per distinct date, since settlement_date is categorical
+        dates = output["settlement_date"].astype("category").cat
+        settlement_days = pd.to_datetime(dates.categories, format="%d/%m/%Y")[dates.codes.to_numpy()]
+        output["settlement_datetime"] = settlement_calendar.settlement_datetimes(
+            settlement_days, output["settlement_period"]
         )
         output = output.reset_index(drop=True).set_index("settlement_datetime")
         return MeteringDataHalfHourlyByBmu(output)
+
+
+BP7 = S0142_records.register(
+    S0142_records.RecordHandler(
+        "BP7", COLUMN_MAP_BP7, dtypes={column: float for column in FLOAT_COLUMNS_BP7}, asset=ProcessedS0142
+    )
+)
+BSC_COLUMNS: list[str] = BP7.output_columns
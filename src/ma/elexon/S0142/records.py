@@ -0,0 +1,163 @@
+"""Extraction of any number of S0142 record types in one pass over a file.
+
+An S0142 file is a sequence of pipe-separated records, nested by position: the report header (the second line) gives
+the settlement date and run, a BPH record opens the section of a BSC party, and an SP7 record sets the settlement
+period of the records that follow it. A RecordHandler turns the records of one type into a dataframe, one row per
+record, with columns for the fields it maps and for the enclosing party, date, period and run. Handlers are
+registered by record type, and extract() feeds each record to the handler of its type, yielding a dataframe per
+record type and party section as the section closes (or the handler's DataFrameAsset of it, if it has one)."""
+
+import gzip
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+import pandas as pd
+
+from ma.elexon.S0142 import gzip_index
+from ma.utils.pandas import DataFrameAsset
+
+SCOPE_RECORD_TYPES = ("BPH", "SP7")  # which open a party section and set the settlement period
+
+Extracted = Tuple[str, Optional[str], Union[pd.DataFrame, DataFrameAsset]]  # (record type, BSC party, rows)
+
+
+class RecordHandler:
+    def __init__(
+        self,
+        record_type: str,
+        columns: Dict[int, str],
+        dtypes: Optional[Dict[str, Any]] = None,
+        asset: Optional[Type[DataFrameAsset]] = None,
+        per_period: bool = True,
+    ):
+        """columns maps field positions (the record type being field 0) to column names, and dtypes column names to
+        the types to cast them to. If per_period, rows have the settlement period of the last SP7 record. asset, if
+        given, is the DataFrameAsset that extract() constructs from the handler's rows."""
+        self.record_type = record_type
+        self.columns = columns
+        self.dtypes = dtypes or {}
+        self.asset = asset
+        self.per_period = per_period
+        self.width = max(columns) + 1
+
+    @property
+    def output_columns(self) -> List[str]:
+        periods = ["Settlement Period"] if self.per_period else []
+        return ["BSC", "Settlement Date", *periods, "Settlement Run Type", *self.columns.values()]
+
+
+class _Section:
+    """The rows of one record type in one party section, collected column-wise"""
+
+    def __init__(self, handler: RecordHandler):
+        self.handler = handler
+        self.settlement_periods: List[int] = []
+        self.fields: List[List[Any]] = [[] for _ in handler.columns]
+
+    def collect(self, record: Sequence, settlement_period: int) -> None:
+        if len(record) < self.handler.width:
+            record = [*record, *[None] * (self.handler.width - len(record))]
+        self.settlement_periods.append(settlement_period)
+        for column, position in zip(self.fields, self.handler.columns):
+            column.append(record[position])
+
+    def to_frame(self, bsc_party_id: Optional[str], settlement_date: str, settlement_run_type: str) -> pd.DataFrame:
+        per_period = self.handler.per_period
+        df = pd.DataFrame(
+            {
+                "BSC": bsc_party_id,
+                "Settlement Date": settlement_date,
+                **({"Settlement Period": self.settlement_periods} if per_period else {}),
+                "Settlement Run Type": settlement_run_type,
+                **dict(zip(self.handler.columns.values(), self.fields)),
+            },
+            index=pd.RangeIndex(len(self.settlement_periods)),
+        )
+        return df.astype(self.handler.dtypes | ({"Settlement Period": int} if per_period else {}))
+
+
+RECORD_HANDLERS: Dict[str, RecordHandler] = {}
+
+
+def register(handler: RecordHandler) -> RecordHandler:
+    RECORD_HANDLERS[handler.record_type] = handler
+    return handler
+
+
+def format_settlement_date(yyyymmdd: str) -> str:
+    return yyyymmdd[6:8] + "/" + yyyymmdd[4:6] + "/" + yyyymmdd[0:4]
+
+
+def extract(
+    records: Iterable[Sequence], record_types: Iterable[str], bsc_party_ids: list[str], typed: bool = True
+) -> Generator[Extracted, None, None]:
+    """Parse S0142 records (each a sequence of the fields of a line) in a single pass, with the registered handlers
+    of record_types.
+
+    Yields (record type, BSC party, rows) for each requested party's section as it closes, for each record type
+    with rows in it, so only one section is held at a time. Records before the first BPH record have no party, and
+    are yielded with party None. Rows are the handler's asset if it has one and typed is set, a dataframe of the
+    record's fields (as output_columns) otherwise."""
+    handlers = {record_type: RECORD_HANDLERS[record_type] for record_type in record_types}
+    all_parties = bsc_party_ids == ["all!"]
+    requested = set(bsc_party_ids)
+    settlement_date, settlement_run_type = "", ""
+    in_section = True  # False within the section of a party that wasn't requested
+    bsc_party_id: Optional[str] = None
+    settlement_period = 0
+
+    sections = {record_type: _Section(handler) for record_type, handler in handlers.items()}
+
+    def close_sections() -> Generator[Extracted, None, None]:
+        for record_type, handler in handlers.items():
+            section = sections[record_type]
+            if in_section and section.settlement_periods:
+                rows = section.to_frame(bsc_party_id, settlement_date, settlement_run_type)
+                yield record_type, bsc_party_id, handler.asset(rows) if typed and handler.asset else rows
+            sections[record_type] = _Section(handler)
+
+    for line_number, record in enumerate(records):
+        record_type = record[0]
+        if record_type == "SP7":
+            settlement_period = int(record[1])
+        elif record_type == "BPH":
+            yield from close_sections()
+            bsc_party_id = record[8]
+            in_section = all_parties or bsc_party_id in requested
+        elif line_number == 1:  # the report header
+            settlement_date, settlement_run_type = format_settlement_date(str(record[1])), record[2]
+        if record_type in sections and in_section:
+            sections[record_type].collect(record, settlement_period)
+    yield from close_sections()
+
+
+def read_records(
+    input_path: Path, record_types: Iterable[str], bsc_party_ids: Optional[list[str]] = None
+) -> Generator[list[Optional[str]], None, None]:
+    """Stream the records of a gzipped S0142 file, split into fields (None where empty).
+
+    Only records of the given types are kept, besides the file and report headers (the first two lines). The file
+    is decompressed as it is read, so memory doesn't grow with its size. If the file has a gzip index (see
+    gzip_index.py), only the sections of bsc_party_ids are decompressed."""
+    prefixes = tuple(f"{record_type}|" for record_type in record_types)
+    index = gzip_index.read_index(input_path) if bsc_party_ids and bsc_party_ids != ["all!"] else None
+    if index is not None:
+        yield from _split_records(gzip_index.read_lines(input_path, index, bsc_party_ids or []), prefixes)
+    else:
+        with gzip.open(input_path, "rt") as file:
+            yield from _split_records(file, prefixes)
+
+
+def _split_records(lines: Iterable[str], prefixes: Tuple[str, ...]) -> Generator[list[Optional[str]], None, None]:
+    for line_number, line in enumerate(lines):
+        if line_number < 2 or line.startswith(prefixes):
+            yield [field if field else None for field in line.rstrip("\r\n").split("|")]
+
+
+def extract_file(
+    input_path: Path, record_types: Iterable[str], bsc_party_ids: list[str], typed: bool = True
+) -> Generator[Extracted, None, None]:
+    """extract() the records of a gzipped S0142 file, decompressing it once whatever the number of record types"""
+    record_types = list(record_types)
+    records = read_records(input_path, [*SCOPE_RECORD_TYPES, *record_types], bsc_party_ids)
+    yield from extract(records, record_types, bsc_party_ids, typed)
@@ -0,0 +1,76 @@
+"""Which of the settlement runs of a day is authoritative.
+
+Each settlement date is settled several times, and each run supersedes the ones before it: II < SF < R1 < R2 < R3 <
+RF < DF. A run can be reissued, in which case the latest issue supersedes the others. Processed S0142 files are named
+after their input (S0142_{yyyymmdd}_{run type}_{issued yyyymmddHHMMSS}...), and CSVs after their party too
+(..._{party}.csv), so they can be resolved by name alone, without reading any data."""
+
+from pathlib import Path
+from typing import Iterable, List
+
+import pandas as pd
+
+from ma.elexon.S0142.manifest import FILENAME_PATTERN
+from ma.utils.io import get_logger
+
+LOG = get_logger(__name__)
+
+SETTLEMENT_RUN_TYPES = ["II", "SF", "R1", "R2", "R3", "RF", "DF"]  # in order of supersession
+LATEST = "latest"
+
+
+def index_files(paths: Iterable[Path]) -> pd.DataFrame:
+    """One row per processed S0142 file: path, settlement_date, settlement_run_type, issued and bsc.
+
+    bsc is taken from a bsc= partition directory, if there is one, or else from the _{party} suffix of a CSV's name;
+    files of different parties are resolved apart.
+    Files not named like processed S0142 files (e.g. a README alongside them) are skipped, with a warning."""
+    rows = []
+    for path in paths:
+        match = FILENAME_PATTERN.match(path.name)
+        if match is None:
+            LOG.warning(f"Skipping {path}: can't tell its settlement date and run")
+            continue
+        if match["run_type"] not in SETTLEMENT_RUN_TYPES:
+            raise ValueError(f"Unknown settlement run type {match['run_type']} of {path}")
+        partitions = dict(part.split("=", 1) for part in path.parent.parts if "=" in part)
+        suffix = path.stem[match.end() :].strip("_")  # the party of a CSV, e.g. GOLD of ..._20230425121906_GOLD.csv
+        bsc = partitions.get("bsc", suffix.rsplit("_", 1)[-1] if path.suffix == ".csv" else "")
+        rows.append(
+            dict(
+                path=path,
+                settlement_date=pd.Timestamp(match["date"]),
+                settlement_run_type=match["run_type"],
+                issued=match["issued"] or "",
+                bsc=bsc,
+            )
+        )
+    return pd.DataFrame(rows, columns=["path", "settlement_date", "settlement_run_type", "issued", "bsc"])
+
+
+def resolve(index: pd.DataFrame, settlement_run: str = LATEST) -> pd.DataFrame:
+    """The rows of index that are authoritative for their settlement date (and party).
+
+    With settlement_run LATEST, that is the latest run available for each date; with a run type, it is that run (and
+    dates without it are left out). Either way, only the latest issue of a run is kept."""
+    if settlement_run != LATEST:
+        if settlement_run not in SETTLEMENT_RUN_TYPES:
+            raise ValueError(f"Unknown settlement run type {settlement_run}")
+        index = index[index["settlement_run_type"] == settlement_run]
+    rank = index["settlement_run_type"].map(SETTLEMENT_RUN_TYPES.index)
+    return (
+        index.assign(rank=rank)
+        .sort_values(["settlement_date", "bsc", "rank", "issued"], kind="stable")
+        .drop_duplicates(["settlement_date", "bsc"], keep="last")
+        .drop(columns="rank")
+    )
+
+
+def superseded(index: pd.DataFrame) -> pd.DataFrame:
+    """The rows of index that a later run or issue supersedes"""
+    return index.drop(resolve(index).index)
+
+
+def authoritative_files(paths: Iterable[Path], settlement_run: str = LATEST) -> List[Path]:
+    """The paths that are authoritative for their settlement date (and party), in date order"""
+    return list(resolve(index_files(paths), settlement_run)["path"])
@@ -39,5 +39,4 @@ class Bmus(DataFrameAsset):
     def _read_from_file(self, filepath: Path) -> pd.DataFrame:
         with open(filepath, "r") as file:
             bmus_raw = pd.DataFrame(json.load(file))
-        return bmus_raw
-        return bmus_raw
+        return bmus_raw if self.from_file_strict_audit else bmus_raw.iloc[:, self._kept_positions()]
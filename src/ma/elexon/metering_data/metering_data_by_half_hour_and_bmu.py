@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -43,11 +43,11 @@ def _rollup_bmus(half_hourly_by_bmu: pd.DataFrame) -> pd.DataFrame:
 class MeteringDataHalfHourlyByBmu(DataFrameAsset):
     # fmt: off
     schema: Dict[str, CS] = dict(
-        bsc                                            =CS(check=pa.Column(str)),
-        settlement_date                                =CS(check=pa.Column(str)),
-        settlement_period                              =CS(check=pa.Column(int)),
-        settlement_run_type                            =CS(check=pa.Column(str)),
-        bm_unit_id                                     =CS(check=pa.Column(str)),
+        bsc                                            =CS(check=pa.Column(str), dtype="category"),
+        settlement_date                                =CS(check=pa.Column(str), dtype="category"),
+        settlement_period                              =CS(check=pa.Column(int), dtype="int16"),
+        settlement_run_type                            =CS(check=pa.Column(str), dtype="category"),
+        bm_unit_id                                     =CS(check=pa.Column(str), dtype="category"),
         information_imbalance_cashflow                 =CS(check=pa.Column(float)),
         bm_unit_period_non_delivery_charge             =CS(check=pa.Column(float)),
         period_fpn                                     =CS(check=pa.Column(float)),
@@ -59,7 +59,7 @@ class MeteringDataHalfHourlyByBmu(DataFrameAsset):
         period_bm_unit_non_delivered_offer_volume      =CS(check=pa.Column(str)),
         transmission_loss_factor                       =CS(check=pa.Column(float)),
         transmission_loss_multiplier                   =CS(check=pa.Column(float)),
-        trading_unit_name                              =CS(check=pa.Column(str)),
+        trading_unit_name                              =CS(check=pa.Column(str), dtype="category"),
         total_trading_unit_metered_volume              =CS(check=pa.Column(float)),
         bm_unit_applicable_balancing_services_volume   =CS(check=pa.Column(float)),
         period_retailer_bm_unit_delivered_volume       =CS(check=pa.Column(float)),
@@ -74,13 +74,13 @@ class MeteringDataHalfHourlyByBmu(DataFrameAsset):
         bm_regex: Optional[str] = None,
         bm_ids: Optional[list] = None,
     ) -> MeteringDataHalfHourlyByBmu:
-        df = self.df
+        df = self.view
         mask = np.ones(len(df), dtype=bool)
         if bm_ids:
             mask &= df["bm_unit_id"].isin(bm_ids)
         if bm_regex:
             mask &= df["bm_unit_id"].str.contains(bm_regex, regex=True)
-        return MeteringDataHalfHourlyByBmu(df[mask])
+        return MeteringDataHalfHourlyByBmu(df[mask], _validated=True)
 
     def transform_to_half_hourly(
         self,
@@ -88,16 +88,20 @@ class MeteringDataHalfHourlyByBmu(DataFrameAsset):
         bm_ids: Optional[list] = None,
     ) -> MeteringDataHalfHourly:
         """Return daily_by_bsc metering data"""
-        result_df = self.filter(bm_regex=bm_regex, bm_ids=bm_ids).df
+        result_df = self.filter(bm_regex=bm_regex, bm_ids=bm_ids).view
         result_df = _segregate_import_exports(result_df)
         result_df = _rollup_bmus(result_df)
         return MeteringDataHalfHourly(result_df)
 
+    def to_dense(self) -> DenseHalfHourlyByBmu:
+        return DenseHalfHourlyByBmu.from_long(self)
+
     def get_fig(self) -> go.Figure:
         fig = go.Figure()
 
-        for bm_unit_id in self.df["bm_unit_id"].unique():
-            bm_unit_data = self.df[self.df["bm_unit_id"] == bm_unit_id]
+        df = self.view
+        for bm_unit_id in df["bm_unit_id"].unique():
+            bm_unit_data = df[df["bm_unit_id"] == bm_unit_id]
 
             fig.add_trace(
                 go.Scatter(
@@ -115,3 +119,119 @@ class MeteringDataHalfHourlyByBmu(DataFrameAsset):
         )
 
         return fig
+
+
+class DenseHalfHourlyByBmu:
+    """MeteringDataHalfHourlyByBmu as 2-D arrays shaped (BM unit, settlement_datetime).
+
+    bm_unit_ids and settlement_datetimes label the axes. Each float column is an array of its own (NaN where a BM unit
+    has no row for a period), and every other column is an array of codes into its categories; present marks the
+    cells that hold a row. Selecting BM units or a time window, and summing across BM units, are array operations."""
+
+    def __init__(
+        self,
+        bm_unit_ids: pd.Index,
+        settlement_datetimes: pd.DatetimeIndex,
+        present: np.ndarray,
+        measures: Dict[str, np.ndarray],
+        labels: Dict[str, Tuple[pd.Index, np.ndarray]],
+    ):
+        self.bm_unit_ids = bm_unit_ids
+        self.settlement_datetimes = settlement_datetimes
+        self.present = present
+        self.measures = measures
+        self.labels = labels
+
+    @classmethod
+    def from_long(cls, half_hourly_by_bmu: MeteringDataHalfHourlyByBmu) -> DenseHalfHourlyByBmu:
+        df = half_hourly_by_bmu.view
+        bmu_codes, bm_unit_ids = pd.factorize(df["bm_unit_id"], sort=True)
+        time_codes, settlement_datetimes = pd.factorize(df.index, sort=True)
+        shape = (len(bm_unit_ids), len(settlement_datetimes))
+        cells = np.ravel_multi_index((bmu_codes, time_codes), shape)
+        if len(np.unique(cells)) != len(cells):
+            raise ValueError("Expected at most one row per BM unit and settlement period")
+
+        present = np.zeros(shape, dtype=bool)
+        present.flat[cells] = True
+        measures, labels = {}, {}
+        for col in df.columns.drop("bm_unit_id"):
+            if pd.api.types.is_float_dtype(df[col]):
+                measures[col] = np.full(shape, np.nan)
+                measures[col].flat[cells] = df[col].to_numpy()
+            else:
+                if isinstance(df[col].dtype, pd.CategoricalDtype):  # keep the categories, and their order
+                    codes, categories = df[col].cat.codes.to_numpy(), df[col].cat.categories
+                else:
+                    codes, categories = pd.factorize(df[col])
+                labels[col] = (pd.Index(categories), np.full(shape, -1, dtype=np.int32))
+                labels[col][1].flat[cells] = codes
+        return cls(pd.Index(bm_unit_ids), pd.DatetimeIndex(settlement_datetimes), present, measures, labels)
+
+    def to_long(self) -> MeteringDataHalfHourlyByBmu:
+        """The rows of the present cells, ordered by settlement_datetime and then bm_unit_id"""
+        time_index, bmu_index = np.nonzero(self.present.T)
+        columns: Dict[str, object] = {}
+        for col in MeteringDataHalfHourlyByBmu.compiled_schema().columns:
+            if col == "bm_unit_id":
+                columns[col] = self.bm_unit_ids[bmu_index]
+            elif col in self.measures:
+                columns[col] = self.measures[col][bmu_index, time_index]
+            else:
+                categories, codes = self.labels[col]
+                columns[col] = pd.Categorical.from_codes(codes[bmu_index, time_index], categories)
+        df = pd.DataFrame(columns, index=self.settlement_datetimes[time_index])
+        return MeteringDataHalfHourlyByBmu(df)
+
+    def _take(self, bmus: np.ndarray | slice, times: slice) -> DenseHalfHourlyByBmu:
+        return DenseHalfHourlyByBmu(
+            self.bm_unit_ids[bmus],
+            self.settlement_datetimes[times],
+            self.present[bmus, times],
+            {col: array[bmus, times] for col, array in self.measures.items()},
+            {col: (categories, codes[bmus, times]) for col, (categories, codes) in self.labels.items()},
+        )
+
+    def select(
+        self,
+        bm_regex: Optional[str] = None,
+        bm_ids: Optional[List[str]] = None,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> DenseHalfHourlyByBmu:
+        """BM units matching bm_regex and in bm_ids (like MeteringDataHalfHourlyByBmu.filter), and settlement
+        periods from start (inclusive) to end (exclusive)"""
+        mask = np.ones(len(self.bm_unit_ids), dtype=bool)
+        if bm_ids:
+            mask &= self.bm_unit_ids.isin(bm_ids)
+        if bm_regex:
+            mask &= self.bm_unit_ids.str.contains(bm_regex, regex=True)
+        times = slice(
+            None if start is None else self.settlement_datetimes.searchsorted(start),
+            None if end is None else self.settlement_datetimes.searchsorted(end),
+        )
+        return self._take(np.flatnonzero(mask), times)
+
+    def sum_bmus(self, measure: str) -> pd.Series:
+        """measure summed across BM units, for each settlement period with any rows"""
+        times = np.flatnonzero(self.present.any(axis=0))
+        return pd.Series(
+            np.nansum(self.measures[measure][:, times], axis=0), index=self.settlement_datetimes[times], name=measure
+        )
+
+    def transform_to_half_hourly(self) -> MeteringDataHalfHourly:
+        """As MeteringDataHalfHourlyByBmu.transform_to_half_hourly, of the BM units selected already"""
+        times = np.flatnonzero(self.present.any(axis=0))
+        half_hourly = pd.DataFrame(
+            {
+                col: np.nansum(self.measures[col][:, times], axis=0)
+                for col in MeteringDataHalfHourly.compiled_schema().columns
+                if col in self.measures
+            },
+            index=self.settlement_datetimes[times],
+        )
+        volume = self.measures["bm_unit_metered_volume_mwh"][:, times]
+        half_hourly["bm_unit_metered_volume_+ve_mwh"] = np.nansum(np.clip(volume, 0, None), axis=0)
+        half_hourly["bm_unit_metered_volume_-ve_mwh"] = np.nansum(np.clip(volume, None, 0), axis=0)
+        half_hourly["bmu_count"] = int(self.present.any(axis=1).sum())
+        return MeteringDataHalfHourly(half_hourly)
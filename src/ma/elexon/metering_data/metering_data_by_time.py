@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Sequence, Type
+from typing import Any, Dict, List, Literal, Sequence, Type, overload
 
 import pandas as pd
 import pandera as pa
 
+from ma.elexon import settlement_calendar
 from ma.retailer.consumption import ConsumptionHalfHourly, ConsumptionMonthly
 from ma.utils.enums import TemporalGranularity
 from ma.utils.pandas import ColumnSchema as CS
@@ -31,7 +32,7 @@ class MeteringDataHalfHourly(DataFrameAsset):
     from_file_skiprows = 1
 
     def transform_to_consumption_half_hourly(self) -> ConsumptionHalfHourly:
-        df = self.df
+        df = self.view
         consumption_half_hourly = pd.DataFrame(
             dict(
                 consumption_mwh=-df["bm_unit_metered_volume_mwh"],  # inversion of sign
@@ -42,39 +43,61 @@ class MeteringDataHalfHourly(DataFrameAsset):
 
     def transform_to_daily(self) -> MeteringDataDaily:
         """Rollup a single, half-hourly dataframe to a daily dataframe"""
-        metering_data_half_hourly = self.df
-        assert isinstance(metering_data_half_hourly.index, pd.DatetimeIndex)  # appease mypy
+        metering_data_half_hourly = self.view
         assert len(metering_data_half_hourly) in (46, 48, 50), (  # robust to daylight savings
             f"Got {len(metering_data_half_hourly)} periods from {metering_data_half_hourly.index.min()} to {metering_data_half_hourly.index.max()}"
         )
-        days = metering_data_half_hourly.index.to_period("D")
-
-        daily_total = (
-            metering_data_half_hourly[
-                [
-                    "period_bm_unit_balancing_services_volume",
-                    "period_information_imbalance_volume",
-                    "period_expected_metered_volume",
-                    "bm_unit_metered_volume_mwh",
-                    "bm_unit_applicable_balancing_services_volume",
-                    "period_retailer_bm_unit_delivered_volume",
-                    "period_retailer_bm_unit_non_bm_absvd_volume",
-                    "bm_unit_metered_volume_+ve_mwh",
-                    "bm_unit_metered_volume_-ve_mwh",
-                    "bmu_count",
-                ]
-            ]
-            .sum()
-            .to_frame()
-            .T
-        )
-        daily_total["settlement_period_count"] = len(metering_data_half_hourly)
-        daily_total.index = pd.Index([days[0]]).to_timestamp()
-        return MeteringDataDaily(daily_total)
+        return self.transform_to_granularity(TemporalGranularity.DAILY)
+
+    @overload
+    def transform_to_granularity(self, granularity: Literal[TemporalGranularity.DAILY]) -> MeteringDataDaily: ...
+
+    @overload
+    def transform_to_granularity(self, granularity: Literal[TemporalGranularity.MONTHLY]) -> MeteringDataMonthly: ...
+
+    @overload
+    def transform_to_granularity(self, granularity: Literal[TemporalGranularity.YEARLY]) -> MeteringDataYearly: ...
+
+    @overload
+    def transform_to_granularity(
+        self, granularity: TemporalGranularity
+    ) -> MeteringDataDaily | MeteringDataMonthly | MeteringDataYearly: ...
+
+    def transform_to_granularity(
+        self, granularity: TemporalGranularity
+    ) -> MeteringDataDaily | MeteringDataMonthly | MeteringDataYearly:
+        """Rollup a half-hourly dataframe spanning any number of days to a daily, monthly or yearly dataframe.
+
+        Periods are grouped by the local day they fall in, and days by month and year, in one pass over the data.
+        Days with fewer periods than the settlement calendar gives them are counted as incomplete; days with none at
+        all are absent."""
+        metering_data_half_hourly = self.view
+        assert isinstance(metering_data_half_hourly.index, pd.DatetimeIndex)  # appease mypy
+        duplicate_count = metering_data_half_hourly.index.duplicated().sum()
+        assert not duplicate_count, f"{duplicate_count} duplicated timestamps"
+
+        days = settlement_calendar.to_local(metering_data_half_hourly.index).normalize()  # index is in UTC
+        grouped = metering_data_half_hourly.groupby(days)
+        daily = grouped.sum()
+        assert isinstance(daily.index, pd.DatetimeIndex)  # appease mypy
+        daily["settlement_period_count"] = grouped.size()
+        daily["expected_settlement_period_count"] = settlement_calendar.periods_in_days(daily.index)
+
+        if granularity == TemporalGranularity.DAILY:
+            return MeteringDataDaily(daily)
+        monthly = _rollup(daily, TemporalGranularity.MONTHLY, "settlement_period_count", MeteringDataMonthly)
+        if granularity == TemporalGranularity.MONTHLY:
+            return MeteringDataMonthly(monthly)
+        if granularity == TemporalGranularity.YEARLY:
+            return MeteringDataYearly(_rollup(monthly, TemporalGranularity.YEARLY, "day_count", MeteringDataYearly))
+        raise ValueError("Expect daily, monthly or yearly granularity")
 
 
 class MeteringDataDaily(DataFrameAsset):
-    schema: Dict[str, CS] = MeteringDataHalfHourly.schema_copy() | {"settlement_period_count": CS(check=pa.Column(int))}
+    schema: Dict[str, CS] = MeteringDataHalfHourly.schema_copy() | {
+        "settlement_period_count": CS(check=pa.Column(int)),
+        "expected_settlement_period_count": CS(check=pa.Column(int)),
+    }
     from_file_skiprows = 1
 
     @classmethod
@@ -88,7 +111,10 @@ class MeteringDataDaily(DataFrameAsset):
 
 
 class MeteringDataMonthly(DataFrameAsset):
-    schema: Dict[str, CS] = MeteringDataHalfHourly.schema_copy() | {"day_count": CS(check=pa.Column(int))}
+    schema: Dict[str, CS] = MeteringDataHalfHourly.schema_copy() | {
+        "day_count": CS(check=pa.Column(int)),
+        "incomplete_day_count": CS(check=pa.Column(int)),
+    }
     from_file_skiprows = 1
 
     @classmethod
@@ -107,7 +133,7 @@ class MeteringDataMonthly(DataFrameAsset):
         )
 
     def transform_to_consumption_monthly(self) -> ConsumptionMonthly:
-        df = self.df
+        df = self.view
         consumption_monthly = pd.DataFrame(
             dict(
                 consumption_mwh=-df["bm_unit_metered_volume_mwh"],  # inversion of sign
@@ -118,7 +144,10 @@ class MeteringDataMonthly(DataFrameAsset):
 
 
 class MeteringDataYearly(DataFrameAsset):
-    schema: Dict[str, CS] = MeteringDataHalfHourly.schema_copy() | {"month_count": CS(check=pa.Column(int))}
+    schema: Dict[str, CS] = MeteringDataHalfHourly.schema_copy() | {
+        "month_count": CS(check=pa.Column(int)),
+        "incomplete_day_count": CS(check=pa.Column(int)),
+    }
     from_file_skiprows = 1
 
 
@@ -140,6 +169,27 @@ def _check_time_range(dfs: List[pd.DataFrame], granularity: TemporalGranularity)
     assert not duplicate_count, f"{duplicate_count} duplicated timestamps"
 
 
+def _rollup(
+    input: pd.DataFrame, granularity: TemporalGranularity, drop_column: str, output_class: Type
+) -> pd.DataFrame:
+    """Rollup daily/monthly rows to monthly/yearly rows, in output_class's column order.
+
+    Counts the input rows, and the incomplete days, of each output row."""
+    assert isinstance(input.index, pd.DatetimeIndex)  # appease mypy
+    periods = input.index.to_period(granularity.pandas_period)
+    if "expected_settlement_period_count" in input:  # daily rows
+        input = input.assign(
+            incomplete_day_count=(input["settlement_period_count"] < input["expected_settlement_period_count"]).astype(
+                int
+            )
+        ).drop(columns="expected_settlement_period_count")
+    grouped = input.drop(columns=drop_column).groupby(periods)
+    output = grouped.sum()
+    output[f"{granularity.preceeding.noun}_count"] = grouped.size()
+    output.index = output.index.to_timestamp()  # type: ignore
+    return output[list(output_class.compiled_schema().columns)]
+
+
 def _transform_to_monthly_or_yearly(
     metering_data_list: Sequence[MeteringDataDaily | MeteringDataMonthly],
     granularity: TemporalGranularity,
@@ -151,14 +201,4 @@ def _transform_to_monthly_or_yearly(
     metering_data_dataframes = [df.df for df in metering_data_list]
     _check_time_range(metering_data_dataframes, granularity)
 
-    input = pd.concat(metering_data_dataframes)
-    assert isinstance(input.index, pd.DatetimeIndex)  # appease mypy
-    input[granularity.noun] = input.index.to_period(granularity.pandas_period)
-
-    output = input.groupby(granularity.noun).sum().sort_values(by=granularity.noun)
-    output.drop(drop_column, axis=1, inplace=True)
-    output[f"{granularity.preceeding.noun}_count"] = len(metering_data_dataframes)
-
-    output.index = output.index.to_timestamp()  # type: ignore
-
-    return output_class(output)
+    return output_class(_rollup(pd.concat(metering_data_dataframes), granularity, drop_column, output_class))
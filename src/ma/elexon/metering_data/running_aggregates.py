@@ -0,0 +1,163 @@
+"""Monthly and yearly metering data per BSC party, kept up to date a settlement day at a time.
+
+RunningAggregates holds running totals per (bsc, month) and (bsc, year), and the daily totals that went into them. A
+day seen for the first time is added to its month and year; a restated day (e.g. from a later settlement run) is added
+as its difference from the day it replaces. An update touches only the months and years of the days it brings, and a
+month or year is read back from its totals, however many days went into it."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from ma.elexon.metering_data.metering_data_by_half_hour_and_bmu import MeteringDataHalfHourlyByBmu
+from ma.elexon.metering_data.metering_data_by_time import (
+    MeteringDataDaily,
+    MeteringDataHalfHourly,
+    MeteringDataMonthly,
+    MeteringDataYearly,
+)
+from ma.elexon.S0142 import settlement_runs
+from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+from ma.utils.enums import TemporalGranularity
+
+VALUE_COLUMNS = list(MeteringDataHalfHourly.compiled_schema().columns)
+TOTAL_COLUMNS = VALUE_COLUMNS + ["day_count", "incomplete_day_count"]  # what's summed, per day, month and year
+GRANULARITIES = (TemporalGranularity.MONTHLY, TemporalGranularity.YEARLY)
+
+Key = Tuple[str, pd.Timestamp]  # (bsc, start of day/month/year)
+
+
+class RunningAggregates:
+    """Monthly and yearly totals of metering data per BSC party, updated with new and restated days"""
+
+    def __init__(self) -> None:
+        self._days: Dict[Key, npt.NDArray[np.float64]] = {}
+        self._day_runs: Dict[Key, int] = {}  # rank of the settlement run of each day, if known
+        self._totals: Dict[TemporalGranularity, Dict[Key, npt.NDArray[np.float64]]] = {g: {} for g in GRANULARITIES}
+
+    @property
+    def bscs(self) -> List[str]:
+        return sorted({bsc for bsc, _ in self._days})
+
+    def update(self, bsc: str, daily: MeteringDataDaily, settlement_run_type: Optional[str] = None) -> int:
+        """Add new days of bsc, or restate days already added; returns the number of days applied.
+
+        With settlement_run_type, days already added from a later run are left as they are, so that runs may arrive
+        in any order. Reissues of the same run replace the days they reissue."""
+        df = daily.view
+        assert isinstance(df.index, pd.DatetimeIndex)  # appease mypy
+        assert not df.index.duplicated().any(), "Duplicated days"
+        rank = None if settlement_run_type is None else settlement_runs.SETTLEMENT_RUN_TYPES.index(settlement_run_type)
+        keys = [(bsc, day) for day in df.index]
+        applied = np.array([rank is None or self._day_runs.get(key, -1) <= rank for key in keys], dtype=bool)
+        if not applied.any():
+            return 0
+
+        days = np.column_stack(
+            [
+                df[VALUE_COLUMNS].to_numpy(dtype=np.float64),
+                np.ones(len(df)),
+                df["settlement_period_count"] < df["expected_settlement_period_count"],
+            ]
+        )[applied]
+        keys = [key for key, is_applied in zip(keys, applied) if is_applied]
+        self._apply(keys, days)
+        if rank is not None:
+            self._day_runs.update((key, rank) for key in keys)
+        return len(keys)
+
+    def _apply(self, keys: List[Key], days: npt.NDArray[np.float64]) -> None:
+        """Replace the totals of the days keys with days, adding the differences to their months and years"""
+        deltas = days - np.array([self._days.get(key, np.zeros(len(TOTAL_COLUMNS))) for key in keys])
+        self._days.update(zip(keys, days))
+        bscs = [bsc for bsc, _ in keys]
+        day_index = pd.DatetimeIndex([day for _, day in keys])
+        for granularity in GRANULARITIES:
+            totals = self._totals[granularity]
+            periods = day_index.to_period(granularity.pandas_period).to_timestamp()
+            summed = pd.DataFrame(deltas).groupby([bscs, periods]).sum()
+            for key, delta in zip(summed.index, summed.to_numpy()):
+                totals[key] = totals[key] + delta if key in totals else delta
+
+    def update_from_processed(
+        self,
+        processed: ProcessedS0142,
+        bm_regex: Optional[str] = "^2__",
+        bm_ids: Optional[list] = None,
+    ) -> int:
+        """update() with the days of each party in a processed S0142 file of a single settlement run"""
+        by_bmu = processed.transform_to_half_hourly_by_bmu().view
+        (settlement_run_type,) = by_bmu["settlement_run_type"].unique()
+        applied = 0
+        for bsc in by_bmu["bsc"].unique():
+            daily = (
+                MeteringDataHalfHourlyByBmu(by_bmu[by_bmu["bsc"] == bsc], _validated=True)
+                .transform_to_half_hourly(bm_regex=bm_regex, bm_ids=bm_ids)
+                .transform_to_granularity(TemporalGranularity.DAILY)
+            )
+            applied += self.update(str(bsc), daily, str(settlement_run_type))
+        return applied
+
+    def _row(self, granularity: TemporalGranularity, bsc: str, period: pd.Timestamp) -> Dict[str, float]:
+        row = dict(zip(TOTAL_COLUMNS, self._totals[granularity][(bsc, period)]))
+        if granularity == TemporalGranularity.YEARLY:
+            months = pd.date_range(period, periods=12, freq="MS")
+            months_with_days = [month for month in months if (bsc, month) in self._totals[TemporalGranularity.MONTHLY]]
+            row["month_count"] = len(months_with_days)
+            del row["day_count"]
+        return row
+
+    def month(self, bsc: str, month: pd.Timestamp) -> pd.Series:
+        """Totals of bsc in the month starting at month, in the columns of MeteringDataMonthly. Raises KeyError if no
+        days of the month have been added."""
+        return pd.Series(self._row(TemporalGranularity.MONTHLY, bsc, month))[
+            list(MeteringDataMonthly.compiled_schema().columns)
+        ]
+
+    def year(self, bsc: str, year: pd.Timestamp) -> pd.Series:
+        """Totals of bsc in the year starting at year, in the columns of MeteringDataYearly. Raises KeyError if no
+        days of the year have been added."""
+        return pd.Series(self._row(TemporalGranularity.YEARLY, bsc, year))[
+            list(MeteringDataYearly.compiled_schema().columns)
+        ]
+
+    def _frame(self, granularity: TemporalGranularity, bsc: str) -> pd.DataFrame:
+        periods = sorted(period for key_bsc, period in self._totals[granularity] if key_bsc == bsc)
+        return pd.DataFrame(
+            [self._row(granularity, bsc, period) for period in periods], index=pd.DatetimeIndex(periods)
+        )
+
+    def monthly(self, bsc: str) -> MeteringDataMonthly:
+        return MeteringDataMonthly(
+            self._frame(TemporalGranularity.MONTHLY, bsc)[list(MeteringDataMonthly.compiled_schema().columns)]
+        )
+
+    def yearly(self, bsc: str) -> MeteringDataYearly:
+        return MeteringDataYearly(
+            self._frame(TemporalGranularity.YEARLY, bsc)[list(MeteringDataYearly.compiled_schema().columns)]
+        )
+
+    def write(self, path: Path) -> None:
+        """Write the daily totals, from which read() rebuilds the months and years"""
+        days = pd.DataFrame(list(self._days.values()), columns=TOTAL_COLUMNS)
+        days.insert(0, "bsc", [bsc for bsc, _ in self._days])
+        days.insert(1, "settlement_day", [day for _, day in self._days])
+        days["settlement_run_rank"] = [self._day_runs.get(key, -1) for key in self._days]
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        days.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def read(cls, path: Path) -> RunningAggregates:
+        aggregates = cls()
+        days = pd.read_parquet(path)
+        keys = list(zip(days["bsc"], days["settlement_day"]))
+        aggregates._apply(keys, days[TOTAL_COLUMNS].to_numpy(dtype=np.float64))
+        aggregates._day_runs = {key: rank for key, rank in zip(keys, days["settlement_run_rank"]) if rank >= 0}
+        return aggregates
@@ -0,0 +1,85 @@
+"""The settlement calendar: the start of each settlement period, in UTC and UK local time.
+
+A settlement day runs from local midnight to local midnight in half-hour periods numbered from 1, so it has 46
+periods when the clocks go forward, 50 when they go back and 48 otherwise. The calendar is built once per process, for
+every day from START to END, as arrays indexed by (day number + period offset), so that timestamps for any number of
+rows are gathered by integer position rather than computed per row."""
+
+import functools
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+TIMEZONE = "Europe/London"
+START = pd.Timestamp("2000-01-01")
+END = pd.Timestamp("2060-01-01")  # exclusive
+PERIOD = pd.Timedelta(minutes=30)
+
+
+@functools.cache
+def _calendar() -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.datetime64]]:
+    """(periods in each day, position of each day's first period, start of each period in naive UTC)"""
+    midnights = pd.date_range(START, END, freq="D").tz_localize(TIMEZONE)  # one more than there are days
+    midnights_utc = midnights.tz_convert("UTC").tz_localize(None).to_numpy()
+    periods_in_day = ((midnights_utc[1:] - midnights_utc[:-1]) // PERIOD.to_timedelta64()).astype(np.int64)
+    first_period = np.concatenate([[0], np.cumsum(periods_in_day)[:-1]])
+    period_in_day = np.arange(periods_in_day.sum()) - np.repeat(first_period, periods_in_day)
+    starts_utc = np.repeat(midnights_utc[:-1], periods_in_day) + period_in_day * PERIOD.to_timedelta64()
+    return periods_in_day, first_period, starts_utc
+
+
+def settlement_calendar() -> pd.DataFrame:
+    """One row per settlement period from START to END: settlement_date, settlement_period, settlement_datetime
+    (naive UTC) and settlement_datetime_local (Europe/London)"""
+    periods_in_day, first_period, starts_utc = _calendar()
+    days = pd.date_range(START, END, freq="D", inclusive="left")
+    return pd.DataFrame(
+        dict(
+            settlement_date=np.repeat(days.to_numpy(), periods_in_day),
+            settlement_period=(np.arange(len(starts_utc)) - np.repeat(first_period, periods_in_day) + 1).astype(
+                np.int16
+            ),
+            settlement_datetime=starts_utc,
+            settlement_datetime_local=pd.DatetimeIndex(starts_utc).tz_localize("UTC").tz_convert(TIMEZONE),
+        )
+    )
+
+
+def _day_numbers(settlement_dates: pd.DatetimeIndex | pd.Series) -> npt.NDArray[np.int64]:
+    """Days since START; raises ValueError for dates outside the calendar"""
+    day_numbers = (np.asarray(settlement_dates, dtype="datetime64[D]") - np.datetime64(START.date(), "D")).astype(
+        np.int64
+    )
+    if len(day_numbers) and (day_numbers.min() < 0 or day_numbers.max() >= len(_calendar()[0])):
+        raise ValueError(f"Settlement dates must be in [{START:%Y-%m-%d}, {END:%Y-%m-%d})")
+    return day_numbers
+
+
+def periods_in_day(settlement_date: pd.Timestamp) -> int:
+    return int(_calendar()[0][(settlement_date.normalize() - START).days])
+
+
+def periods_in_days(settlement_dates: pd.DatetimeIndex | pd.Series) -> npt.NDArray[np.int64]:
+    """The number of settlement periods in each of settlement_dates"""
+    return _calendar()[0][_day_numbers(settlement_dates)]
+
+
+def settlement_datetimes(
+    settlement_dates: pd.DatetimeIndex | pd.Series, settlement_periods: npt.ArrayLike
+) -> npt.NDArray[np.datetime64]:
+    """The start of each (settlement date, settlement period) in naive UTC, gathered from the calendar.
+
+    Raises ValueError for dates outside the calendar, or periods that the day doesn't have."""
+    periods_in_day, first_period, starts_utc = _calendar()
+    day_numbers = _day_numbers(settlement_dates)
+    periods = np.asarray(settlement_periods, dtype=np.int64)
+    if np.any((periods < 1) | (periods > periods_in_day[day_numbers])):
+        raise ValueError("Settlement period out of range for its settlement date")
+    return starts_utc[first_period[day_numbers] + periods - 1]
+
+
+def to_local(utc: pd.Index | pd.Series) -> pd.DatetimeIndex:
+    """Naive UTC timestamps as naive UK local time, e.g. to label settlement days and months"""
+    return pd.DatetimeIndex(utc).tz_localize("UTC").tz_convert(TIMEZONE).tz_localize(None)
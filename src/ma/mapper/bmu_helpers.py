@@ -1,10 +1,13 @@
 import copy
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable
 
 import pandas as pd
 
+from ma.elexon import settlement_calendar
 from ma.elexon.metering_data.metering_data_by_half_hour_and_bmu import MeteringDataHalfHourlyByBmu
+from ma.elexon.S0142 import dataset as S0142_dataset
+from ma.elexon.S0142 import settlement_runs
 from ma.elexon.S0142.processed_S0142 import ProcessedS0142
 from ma.mapper.common import MappingException
 
@@ -13,7 +16,8 @@ def half_hourly_to_monthly_volumes(metering_data_half_hourly: pd.DataFrame) -> p
     metering_data_half_hourly = copy.deepcopy(metering_data_half_hourly)
     assert isinstance(metering_data_half_hourly.index, pd.DatetimeIndex)  # appease mypy
     metering_data_half_hourly["settlement_datetime"] = metering_data_half_hourly.index
-    metering_data_half_hourly["settlement_month"] = metering_data_half_hourly["settlement_datetime"].dt.month
+    # settlement_datetime is in UTC, so the first period of a month in summer starts in the month before
+    metering_data_half_hourly["settlement_month"] = settlement_calendar.to_local(metering_data_half_hourly.index).month
     metering_data_monthly = (
         metering_data_half_hourly.groupby("settlement_month")
         .agg(
@@ -31,16 +35,26 @@ def get_bmu_volumes_by_month(
     bsc_lead_party_id: str,
     bm_ids: list,
     S0142_csv_dir: Path,
+    settlement_run: str = settlement_runs.LATEST,
 ) -> pd.DataFrame:
+    """Volumes of the authoritative settlement run of each day (see settlement_runs.resolve)"""
+    if S0142_dataset.is_dataset(S0142_csv_dir):  # only the party's BM units are read
+        processed: Iterable[ProcessedS0142] = [
+            S0142_dataset.read_processed(
+                S0142_csv_dir, bsc_party_ids=[bsc_lead_party_id], bm_unit_ids=bm_ids, settlement_run=settlement_run
+            )
+        ]
+    else:
+        files = [f for f in (S0142_csv_dir / Path(bsc_lead_party_id)).iterdir() if f.is_file()]
+        processed = (ProcessedS0142(f) for f in settlement_runs.authoritative_files(files, settlement_run))
     metering_data_half_hourly = pd.concat(
         [
             MeteringDataHalfHourlyByBmu.transform_to_half_hourly(
-                ProcessedS0142(f).transform_to_half_hourly_by_bmu(),
+                p.transform_to_half_hourly_by_bmu(),
                 bm_regex=None,
                 bm_ids=bm_ids,
             ).df
-            for f in (S0142_csv_dir / Path(bsc_lead_party_id)).iterdir()
-            if f.is_file()
+            for p in processed
         ]
     ).sort_index()
     metering_data_monthly = half_hourly_to_monthly_volumes(metering_data_half_hourly)
@@ -41,7 +41,7 @@ def map_station(
         generator_profile.update(get_generator_profile(rego_station_name, regos, accredited_stations))
 
         # Add matching BMUs
-        matching_bmus = get_matching_bmus(generator_profile, bmus.df, expected_mapping)
+        matching_bmus = get_matching_bmus(generator_profile, bmus.view, expected_mapping)
         validate_matching_bmus(matching_bmus)
         generator_profile.update(get_matching_bmus_dict(matching_bmus))
 
@@ -120,7 +120,7 @@ def cli(
         stop,
         RegosRaw(regos_path).transform_to_regos_processed().filter(statuses=[RegoStatus.REDEEMED]),
         ma.ofgem.stations.load_rego_stations_processed_from_dir(accredited_stations_dir),
-        Bmus(bmus_path),
+        Bmus(bmus_path, lazy=True),  # read on first use, so not at all if no station gets that far
         bmu_vol_dir,
         (from_yaml_file(expected_mappings_file) if expected_mappings_file else {}),
         mappings_path,
@@ -59,7 +59,8 @@ class MatchBase(DataFrameAsset):
         Returns:
             A MatchBase instance (either MatchHalfHourly or MatchMonthly)
         """
-        supply_df = supply.df.copy()
+        supply_df = supply.view  # only whole columns are added below, so no copy is needed
+        consumption_df = consumption.view
 
         # check the correct combination of supply and consumption types
         if isinstance(supply, UpsampledSupplyHalfHourly) and isinstance(consumption, ConsumptionHalfHourly):
@@ -82,9 +83,9 @@ class MatchBase(DataFrameAsset):
             )
         else:
             supply_df["holder"] = supply_df["retailer"]
-            if not supply_df.index.equals(consumption.df.index):
+            if not supply_df.index.equals(consumption_df.index):
                 raise ValueError(
-                    f"Supply and consumption cover different time periods: {supply_df.index.min()} to {supply_df.index.max()} and {consumption.df.index.min()} to {consumption.df.index.max()}"
+                    f"Supply and consumption cover different time periods: {supply_df.index.min()} to {supply_df.index.max()} and {consumption_df.index.min()} to {consumption_df.index.max()}"
                 )
             supply_pivoted = supply_df.groupby("timestamp").agg(
                 supply_total_mwh=("supply_mwh", "sum"),
@@ -104,7 +105,7 @@ class MatchBase(DataFrameAsset):
             ).fillna(0)
 
         # Join with consumption data
-        match_df = supply_pivoted.join(consumption.df, how="inner")
+        match_df = supply_pivoted.join(consumption_df, how="inner")
 
         # Calculate matching metrics
         match_df["supply_surplus_mwh"], match_df["supply_deficit_mwh"] = calculate_supply_surplus_deficit(
@@ -123,7 +124,7 @@ class MatchBase(DataFrameAsset):
     # (e.g. in MatchMonthly, the return type for the transform function is MatchHalfHourlyAnnualised)
     def _transform_to_match_annualised(self) -> pd.DataFrame:
         # fmt: off
-        agg = (self.df.reset_index()
+        agg = (self.view.reset_index()
                 .groupby(lambda _: 0)
                 .agg(
                     timestamp                   =("timestamp",           "first"),
@@ -154,7 +155,7 @@ class MatchBase(DataFrameAsset):
         return agg
 
     def plot(self) -> go.Figure:
-        return plot_supply_consumption_matching(self.df)
+        return plot_supply_consumption_matching(self.view)
 
 
 class MatchAnnualisedBase(DataFrameAsset):
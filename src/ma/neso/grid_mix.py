@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from typing import Dict
+from ma.utils.cache import cached_transform
 from ma.utils.enums import SupplyTechEnum
 from ma.utils.pandas import DataFrameAsset
 import pandas as pd
@@ -53,6 +54,7 @@ class GridMixRaw(DataFrameAsset):
     from_file_header = 0
     # fmt: on
 
+    @cached_transform
     def transform_to_grid_mix_processed(self) -> GridMixProcessed:
         grid_mix = self.df
         grid_mix.columns = grid_mix.columns.str.lower()  # for readability
@@ -85,14 +87,15 @@ class GridMixProcessed(DataFrameAsset):
         """
         Filter by start and end datetime, exclusive of the end datetime.
         """
-        filtered_grid_mix = self.df[(self.df.index >= start_datetime) & (self.df.index < end_datetime)]
-        return GridMixProcessed(filtered_grid_mix)
+        grid_mix = self.view
+        filtered_grid_mix = grid_mix[(grid_mix.index >= start_datetime) & (grid_mix.index < end_datetime)]
+        return GridMixProcessed(filtered_grid_mix, _validated=True)
 
     def transform_to_grid_mix_by_tech_month(self) -> GridMixByTechMonth:
         """
         Group by tech and month, and sum the values. Returns MWh per month for each tech.
         """
-        grid_mix = self.df.reset_index()
+        grid_mix = self.view.reset_index()
         # Convert to first day of each month for consistent datetime handling
         grid_mix["month"] = pd.to_datetime(grid_mix["datetime"].dt.to_period("M").astype(str))
         grouped = grid_mix.groupby("month")[[f"{t.value}_mwh" for t in SupplyTechEnum]].sum()
@@ -8,6 +8,7 @@ import pandera as pa
 from dateutil.relativedelta import relativedelta
 
 from ma.ofgem.enums import RegoCompliancePeriod, RegoScheme, RegoStatus
+from ma.utils.cache import cached_transform
 from ma.utils.enums import SupplyTechEnum
 from ma.utils.pandas import ColumnSchema as CS
 from ma.utils.pandas import DataFrameAsset
@@ -54,6 +55,7 @@ class RegosRaw(DataFrameAsset):
         "Biomass 50kW DNC or less": SupplyTechEnum.BIOMASS,
     }
 
+    @cached_transform
     def transform_to_regos_processed(self) -> RegosProcessed:
         regos = self.df
         regos["rego_mwh"] = regos["mwh_per_certificate"] * regos["certificate_count"]
@@ -119,7 +121,7 @@ class RegosProcessed(DataFrameAsset):
         accreditation_number        =CS(check=pa.Column(str)),
         station_name                =CS(check=pa.Column(str)),
         station_tic                 =CS(check=pa.Column(float)),
-        scheme                      =CS(check=pa.Column(str)),
+        scheme                      =CS(check=pa.Column(str), dtype="category"),
         country                     =CS(check=pa.Column(str)),
         technology_group            =CS(check=pa.Column(str)),
         generation_type             =CS(check=pa.Column(str, nullable=True)),
@@ -131,10 +133,12 @@ class RegosProcessed(DataFrameAsset):
         issue_date                  =CS(check=pa.Column(DTE(dayfirst=False))),
         certificate_status          =CS(check=pa.Column(str)),
         status_date                 =CS(check=pa.Column(DTE(dayfirst=False))),
-        current_holder              =CS(check=pa.Column(str)),
+        current_holder              =CS(check=pa.Column(str), dtype="category"),
         company_registration_number =CS(check=pa.Column(str, nullable=True)),
         rego_mwh                    =CS(check=pa.Column(float)),
-        tech                        =CS(check=pa.Column(str, checks=pa.Check.isin(SupplyTechEnum.alphabetical_renewables()))),
+        tech                        =CS(
+            check=pa.Column(str, checks=pa.Check.isin(SupplyTechEnum.alphabetical_renewables())), dtype="category"
+        ),
         start_year_month            =CS(check=pa.Column(DTE(dayfirst=False))),
         end_year_month              =CS(check=pa.Column(DTE(dayfirst=False))),
         period_months               =CS(check=pa.Column(int)),
@@ -150,36 +154,36 @@ class RegosProcessed(DataFrameAsset):
         schemes: Optional[list[RegoScheme]] = [RegoScheme.REGO],
         reporting_period: Optional[RegoCompliancePeriod] = None,
     ) -> RegosProcessed:
+        regos = self.view
         filters = []
         if holders:
-            filters.append((self.df["current_holder"].isin(holders)))
+            filters.append((regos["current_holder"].isin(holders)))
 
         if statuses:
-            filters.append(self.df["certificate_status"].isin(statuses))
+            filters.append(regos["certificate_status"].isin(statuses))
 
         if schemes:
-            filters.append(self.df["scheme"].isin(schemes))
+            filters.append(regos["scheme"].isin(schemes))
 
         if reporting_period:
             start_date, end_date = reporting_period.date_range
             start_year_month = pd.Timestamp(start_date)
             end_year_month = pd.Timestamp(end_date)
-            period_filter = (self.df["start_year_month"] >= start_year_month) & (
-                self.df["end_year_month"] < end_year_month
-            )
+            period_filter = (regos["start_year_month"] >= start_year_month) & (regos["end_year_month"] < end_year_month)
             filters.append(period_filter)
 
         if not filters:
-            return RegosProcessed(self.df)
+            return RegosProcessed(regos, _validated=True)
         else:
-            return RegosProcessed(self.df.loc[np.logical_and.reduce(filters)])
+            return RegosProcessed(regos.loc[np.logical_and.reduce(filters)], _validated=True)
 
     def groupby_station(self) -> pd.DataFrame:
         # Note: this function could become 'transform_to_regos_by_station' if/when we introduce
         # RegosByStation(DataFrameAsset)
 
         # Check columns that are expected to be unique
-        unique_count_by_station = self.df.groupby("station_name").agg(
+        regos = self.view
+        unique_count_by_station = regos.groupby("station_name").agg(
             accredition_number_unique=("accreditation_number", "nunique"),
             company_registration_number_unique=("company_registration_number", "nunique"),
             technology_group_unique=("technology_group", "nunique"),
@@ -194,7 +198,7 @@ class RegosProcessed(DataFrameAsset):
 
         # Groupby
         regos_by_station = (
-            self.df.groupby("station_name")
+            regos.groupby("station_name")
             .agg(
                 accredition_number=("accreditation_number", "first"),
                 company_registration_number=("company_registration_number", "first"),
@@ -220,7 +224,7 @@ class RegosProcessed(DataFrameAsset):
         """
         expanded_rows = []
 
-        for _, row in self.df.iterrows():
+        for _, row in self.view.iterrows():
             # If there's only one month, keep the row as is
             if row["period_months"] == 1:
                 expanded_rows.append(row.to_dict())
@@ -242,6 +246,7 @@ class RegosProcessed(DataFrameAsset):
 
         return pd.DataFrame(expanded_rows)
 
+    @cached_transform
     def transform_to_regos_by_tech_month_holder(self) -> RegosByTechMonthHolder:
         # Extract month from start_year_month for grouping
         regos = self.df
@@ -255,7 +260,7 @@ class RegosProcessed(DataFrameAsset):
 
         # Groupby tech, month, and holder
         regos_by_tech_month_holder = (
-            regos.groupby(["tech", "month", "current_holder"])
+            regos.groupby(["tech", "month", "current_holder"], observed=True)
             .agg(
                 rego_mwh=("rego_mwh", "sum"),
                 station_count=("station_name", "nunique"),
@@ -272,8 +277,10 @@ class RegosByTechMonthHolder(DataFrameAsset):
     # fmt: off
     schema: Dict[str, CS] = dict( 
         month             =CS(check=pa.Index(DTE(dayfirst=False))),
-        tech              =CS(check=pa.Column(str, checks=pa.Check.isin(SupplyTechEnum.alphabetical_renewables()))),
-        current_holder    =CS(check=pa.Column(str)),
+        tech              =CS(
+            check=pa.Column(str, checks=pa.Check.isin(SupplyTechEnum.alphabetical_renewables())), dtype="category"
+        ),
+        current_holder    =CS(check=pa.Column(str), dtype="category"),
         rego_mwh          =CS(check=pa.Column(float)),
         station_count     =CS(check=pa.Column(int)),
     )
@@ -285,4 +292,5 @@ class RegosByTechMonthHolder(DataFrameAsset):
         self,
         holders: List[str],
     ) -> RegosByTechMonthHolder:
-        return RegosByTechMonthHolder(self.df[self.df["current_holder"].isin(holders)])
+        regos = self.view
+        return RegosByTechMonthHolder(regos[regos["current_holder"].isin(holders)], _validated=True)
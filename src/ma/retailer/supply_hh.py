@@ -22,8 +22,8 @@ class UpsampledSupplyHalfHourly(DataFrameAsset):
     schema: Dict[str, CS] = dict(
         timestamp         =CS(check=pa.Index(DTE(dayfirst=False))),
         supply_mwh        =CS(check=pa.Column(float)),
-        tech              =CS(check=pa.Column(str)),
-        retailer          =CS(check=pa.Column(str)),
+        tech              =CS(check=pa.Column(str), dtype="category"),
+        retailer          =CS(check=pa.Column(str), dtype="category"),
     )
     # fmt: on
 
@@ -38,7 +38,7 @@ def _calculate_scaling_factors(
     of grid generation that should be allocated to each retailer.
     """
 
-    grid_mix_by_tech_month_df = grid_mix_by_tech_by_month.df
+    grid_mix_by_tech_month_df = grid_mix_by_tech_by_month.view
     tech_columns = [col for col in grid_mix_by_tech_month_df.columns if col.endswith("_mwh")]
 
     # Convert from wide to long format, resetting index to get month as a column
@@ -54,7 +54,7 @@ def _calculate_scaling_factors(
     grid_mix_long["tech"] = grid_mix_long["tech_column"].str.replace("_mwh", "")
 
     # Reset index to get month as a column
-    rego_df = regos_by_tech_month_holder.df.reset_index()
+    rego_df = regos_by_tech_month_holder.view.reset_index()
 
     # Merge with retailer data
     merged_data = pd.merge(
@@ -88,7 +88,7 @@ def _scale_hh_with_fraction_of_grid(grid_mix: GridMixProcessed, scaling_df: pd.D
     if scaling_df.empty:
         return UpsampledSupplyHalfHourly(pd.DataFrame(columns=["timestamp", "tech", "retailer", "supply_mwh"]))
 
-    grid_df = grid_mix.df
+    grid_df = grid_mix.view
     scaling = scaling_df.copy()
 
     # Extract year and month from the timestamp index to enable joining
@@ -157,7 +157,7 @@ def _validate_date_ranges(
     error_messages = []
 
     # Check REGOS data range
-    regos_df = regos.df
+    regos_df = regos.view
     regos_period_starts = pd.to_datetime(regos_df["start_year_month"])
     regos_period_ends = pd.to_datetime(regos_df["end_year_month"])
     regos_min_date = regos_period_starts.min()
@@ -171,8 +171,9 @@ def _validate_date_ranges(
         error_messages.append("End date is after the latest date in the REGOS data.")
 
     # Check grid mix data range with half-open interval handling
-    grid_min_date = grid_mix.df.index.min()
-    grid_max_date = grid_mix.df.index.max()
+    grid_mix_df = grid_mix.view
+    grid_min_date = grid_mix_df.index.min()
+    grid_max_date = grid_mix_df.index.max()
 
     # Calculate the next timestamp after the last available data point
     # This represents the first invalid timestamp in a half-open interval
@@ -186,7 +187,7 @@ def _validate_date_ranges(
         error_messages.append("End date is after the latest date in the grid mix data.")
 
     # Apply half-open interval [start_datetime, end_datetime) for filtering
-    filtered_grid_mix = grid_mix.df[(grid_mix.df.index >= start_datetime) & (grid_mix.df.index < end_datetime)]
+    filtered_grid_mix = grid_mix_df[(grid_mix_df.index >= start_datetime) & (grid_mix_df.index < end_datetime)]
     if len(filtered_grid_mix) == 0:
         error_messages.append("No grid mix data available within the specified date range.")
 
@@ -258,7 +259,7 @@ def upsample_retailer_monthly_supply_to_hh(
     # Set timestamp as index to make subsequent operations easier
 
     if output_path:
-        result.df.to_csv(output_path)
+        result.view.to_csv(output_path)
         click.echo(f"Results saved to {output_path}")
     else:
         click.echo("Results calculated but not saved (no output path provided)")
@@ -0,0 +1,227 @@
+"""Content-addressed, on-disk memoization of transform_to_* methods.
+
+Results are keyed on (input asset content hash, method, arguments, code version) and stored as Parquet, so a hit
+is loaded typed and without re-validation. The cache is off unless activated, either by set_transform_cache /
+the transform_cache context manager, or by setting MA_TRANSFORM_CACHE_DIR (and optionally
+MA_TRANSFORM_CACHE_MAX_BYTES) in the environment."""
+
+import enum
+import functools
+import importlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import pandas as pd
+import xxhash
+
+from ma.utils.conf import get_code_version
+from ma.utils.io import get_logger
+from ma.utils.pandas import DataFrameAsset
+
+LOG = get_logger(__name__)
+
+DEFAULT_MAX_BYTES = 10 * 2**30
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class UncacheableArgument(TypeError):
+    pass
+
+
+def _encode_argument(value: Any) -> Any:
+    if isinstance(value, DataFrameAsset):
+        return dict(type=type(value).__name__, hash=value.content_hash)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (pd.Timestamp, pd.Timedelta, Path)):
+        return str(value)
+    raise UncacheableArgument(f"Can't derive a cache key from {type(value).__name__}")
+
+
+def _import_class(module: str, qualname: str) -> type:
+    obj: Any = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+class TransformCache:
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.code_version = get_code_version()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, asset: DataFrameAsset, method_name: str, args: tuple, kwargs: dict) -> str:
+        """Raises UncacheableArgument if an argument can't be encoded"""
+        description = dict(
+            input=_encode_argument(asset),
+            method=method_name,
+            args=args,
+            kwargs=kwargs,
+            ma_version=self.code_version,
+        )
+        return xxhash.xxh64(json.dumps(description, sort_keys=True, default=_encode_argument).encode()).hexdigest()
+
+    def _data_path(self, key: str) -> Path:
+        return self.directory / f"{key}.parquet"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[DataFrameAsset]:
+        data_path, meta_path = self._data_path(key), self._meta_path(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+            asset = _import_class(meta["output_module"], meta["output_class"])(data_path)
+        except FileNotFoundError:
+            self._remove(key)  # whichever half of an entry exists without the other can't be loaded
+            self.misses += 1
+            return None
+        except Exception as e:  # e.g. a truncated file, or an output class that no longer exists
+            LOG.warning(f"Dropping unreadable cache entry {key}: {e}")
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        os.utime(data_path)  # mark as recently used
+        self.hits += 1
+        return asset
+
+    def put(self, key: str, asset: DataFrameAsset, input_asset: DataFrameAsset, method_name: str) -> None:
+        output_class = type(asset)
+        if "<locals>" in output_class.__qualname__:
+            return  # can't be imported again on a hit
+
+        # Written aside and renamed, so that readers never see partial files. Meta goes first: data without meta
+        # can't be loaded, so a put interrupted between the two leaves a miss rather than an orphan data file.
+        tmp_directory = self.directory / ".tmp"
+        tmp_directory.mkdir(exist_ok=True)
+        meta = dict(
+            output_module=output_class.__module__,
+            output_class=output_class.__qualname__,
+            input_type=type(input_asset).__name__,
+            input_hash=input_asset.content_hash,
+            method=method_name,
+            ma_version=self.code_version,
+            created=time.time(),
+        )
+        (tmp_directory / f"{key}.json").write_text(json.dumps(meta))
+        os.replace(tmp_directory / f"{key}.json", self._meta_path(key))
+        asset.write(tmp_directory / f"{key}.parquet")
+        os.replace(tmp_directory / f"{key}.parquet", self._data_path(key))
+        self._evict()
+
+    def entries(self) -> List[Dict]:
+        """Metadata of every entry, with its key"""
+        entries = []
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                entries.append(json.loads(meta_path.read_text()) | dict(key=meta_path.stem))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.iterdir() if path.is_file())
+
+    def invalidate(
+        self,
+        input_type: Optional[str] = None,
+        method: Optional[str] = None,
+        ma_version: Optional[str] = None,
+    ) -> int:
+        """Remove entries matching all of the given criteria (all entries if none are given). Returns the count."""
+        removed = 0
+        for entry in self.entries():
+            if (
+                (input_type is None or entry.get("input_type") == input_type)
+                and (method is None or entry.get("method") == method)
+                and (ma_version is None or entry.get("ma_version") == ma_version)
+            ):
+                self._remove(entry["key"])
+                removed += 1
+        return removed
+
+    def _remove(self, key: str) -> None:
+        for path in (self._data_path(key), self._meta_path(key)):  # data first, so as never to orphan it
+            path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Remove data without meta (which can't be loaded), then least recently used entries, until the cache fits in
+        max_bytes"""
+        data_paths = sorted(
+            self.directory.glob("*.parquet"),
+            key=lambda path: (self._meta_path(path.stem).exists(), path.stat().st_mtime_ns),
+        )
+        size = self.size_bytes()
+        for data_path in data_paths:
+            if size <= self.max_bytes:
+                break
+            size -= sum(p.stat().st_size for p in (data_path, self._meta_path(data_path.stem)) if p.exists())
+            self._remove(data_path.stem)
+
+
+_ACTIVE_CACHE: Optional[TransformCache] = None
+_ACTIVE_CACHE_FROM_ENV: Optional[TransformCache] = None
+
+
+def set_transform_cache(cache: Optional[TransformCache]) -> Optional[TransformCache]:
+    """Activate (or with None, deactivate) a cache; returns the previously active one"""
+    global _ACTIVE_CACHE
+    previous, _ACTIVE_CACHE = _ACTIVE_CACHE, cache
+    return previous
+
+
+def get_transform_cache() -> Optional[TransformCache]:
+    global _ACTIVE_CACHE_FROM_ENV
+    if _ACTIVE_CACHE is not None:
+        return _ACTIVE_CACHE
+    if directory := os.getenv("MA_TRANSFORM_CACHE_DIR"):
+        if _ACTIVE_CACHE_FROM_ENV is None or _ACTIVE_CACHE_FROM_ENV.directory != Path(directory):
+            max_bytes = int(os.getenv("MA_TRANSFORM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+            _ACTIVE_CACHE_FROM_ENV = TransformCache(Path(directory), max_bytes)
+        return _ACTIVE_CACHE_FROM_ENV
+    return None
+
+
+@contextmanager
+def transform_cache(directory: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> Iterator[TransformCache]:
+    cache = TransformCache(directory, max_bytes)
+    previous = set_transform_cache(cache)
+    try:
+        yield cache
+    finally:
+        set_transform_cache(previous)
+
+
+def cached_transform(method: F) -> F:
+    """Memoize a DataFrameAsset method returning a DataFrameAsset in the active TransformCache, if any"""
+
+    @functools.wraps(method)
+    def wrapper(self: DataFrameAsset, *args: Any, **kwargs: Any) -> Any:
+        cache = get_transform_cache()
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        method_name = f"{type(self).__name__}.{method.__name__}"
+        try:
+            key = cache.key(self, method_name, args, kwargs)
+        except UncacheableArgument as e:
+            LOG.debug(f"Not caching {method_name}: {e}")
+            return method(self, *args, **kwargs)
+
+        if (result := cache.get(key)) is not None:
+            return result
+        result = method(self, *args, **kwargs)
+        cache.put(key, result, self, method_name)
+        return result
+
+    return wrapper  # type: ignore
@@ -1,17 +1,33 @@
+"""Configuration from the environment (and .env), and the version of this code.
+
+Both are resolved on first use and cached for the life of the process, so importing ma reads no files and runs no
+subprocesses."""
+
+import functools
 import os
 from pathlib import Path
 
-from dotenv import load_dotenv
-from setuptools_scm import get_version  # type: ignore
 
+@functools.cache
+def load_dot_env() -> None:
+    from dotenv import load_dotenv
 
-def get_dot_env(key: str) -> str:
     load_dotenv()
+
+
+def get_dot_env(key: str) -> str:
+    load_dot_env()
     value = os.getenv(key, None)
     if value is None:
         raise Exception(f".env key {key} is None")
     return value
 
 
+@functools.cache
 def get_code_version() -> str:
+    """MA_CODE_VERSION if set (e.g. baked into an image at build time), otherwise from git via setuptools_scm"""
+    if version := os.getenv("MA_CODE_VERSION"):
+        return version
+    from setuptools_scm import get_version  # type: ignore
+
     return get_version(root=Path(__file__).parent.parent.parent.parent, fallback_version="unknown")
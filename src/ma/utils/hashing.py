@@ -0,0 +1,81 @@
+from typing import Union
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import xxhash
+
+HASH_FORMAT_VERSION = "1"  # bump if the hashed representation changes
+
+
+def _update_with_column(hasher: xxhash.xxh64, name: str, values: Union[pd.Series, pd.Index]) -> None:
+    """Hash one column by reading its buffers directly.
+
+    Each kind of data is first put in a fixed representation (little-endian int64/float64, datetimes in ns since the
+    epoch, strings as Arrow offsets and UTF-8 data), so that equal content hashes equally regardless of storage dtype,
+    block layout or pandas version."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        values = values.astype(dtype.categories.dtype)  # hash values, not category codes
+        dtype = values.dtype
+
+    if pd.api.types.is_bool_dtype(dtype) and not values.hasnans:
+        kind, buffers = "bool", [values.to_numpy(dtype=np.uint8)]
+    elif pd.api.types.is_integer_dtype(dtype) and not values.hasnans:
+        kind, buffers = "int", [values.to_numpy(dtype="<i8")]
+    elif pd.api.types.is_float_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        floats = values.to_numpy(dtype="<f8", na_value=np.nan) + 0.0  # + 0.0 turns -0.0 into 0.0
+        kind, buffers = "float", [np.where(np.isnan(floats), np.nan, floats)]  # canonical NaN
+    elif isinstance(dtype, pd.DatetimeTZDtype):
+        kind = f"datetime[{dtype.tz}]"
+        utc = pd.DatetimeIndex(values).tz_convert("UTC").tz_localize(None)
+        buffers = [utc.to_numpy(dtype="datetime64[ns]").view("<i8")]
+    elif pd.api.types.is_datetime64_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype):
+        unit = "datetime64[ns]" if pd.api.types.is_datetime64_dtype(dtype) else "timedelta64[ns]"
+        kind, buffers = unit, [values.to_numpy(dtype=unit).view("<i8")]
+    else:
+        objects = values.to_numpy(dtype=object)
+        nulls = pd.isna(objects)
+        try:
+            strings = pyarrow.array(objects, type=pyarrow.large_string(), mask=nulls)
+        except (pyarrow.ArrowException, TypeError):  # e.g. mixed or non-str objects
+            strings = pyarrow.array(objects.astype(str), type=pyarrow.large_string(), mask=nulls)
+        _, offsets_buffer, data_buffer = strings.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype="<i8", count=len(strings) + 1)[strings.offset :]
+        kind = "str"
+        buffers = [
+            nulls.astype(np.uint8),
+            offsets - offsets[0],
+            np.frombuffer(data_buffer, dtype=np.uint8, count=offsets[-1])[offsets[0] :]
+            if data_buffer
+            else np.empty(0, dtype=np.uint8),
+        ]
+
+    hasher.update(f"|{name}|{kind}|".encode())
+    for buffer in buffers:
+        hasher.update(np.ascontiguousarray(buffer).data)
+
+
+def hash_dataframe(df: pd.DataFrame) -> str:
+    """Content hash of a dataframe, stable across processes and pandas versions, so usable as a cache key.
+
+    Covers the index, column names, column order and values, but not storage dtypes."""
+    hasher = xxhash.xxh64()
+    hasher.update(f"v{HASH_FORMAT_VERSION}|{len(df)}|".encode())
+    _update_with_column(hasher, f"index:{df.index.name}", df.index)
+    for col in df.columns:
+        _update_with_column(hasher, str(col), df[col])
+    return hasher.hexdigest()
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """A 64-bit fingerprint of each row's values (not its index), equal for rows of equal values whatever their
+    storage dtypes. For comparing rows within a process; unlike hash_dataframe, not stable across pandas versions."""
+    normalised = df.copy()
+    for col in normalised.columns:
+        dtype = normalised[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            normalised[col] = normalised[col].astype(dtype.categories.dtype)
+        if pd.api.types.is_float_dtype(normalised[col].dtype):
+            normalised[col] = normalised[col] + 0.0  # + 0.0 turns -0.0 into 0.0
+    return pd.util.hash_pandas_object(normalised, index=False).to_numpy()
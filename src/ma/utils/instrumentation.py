@@ -0,0 +1,214 @@
+"""Timing and memory of DataFrameAsset construction, file reads and writes, validation and transforms.
+
+Off unless activated, either by the instrumentation context manager or by setting MA_INSTRUMENT in the environment:
+to a path ending in .jsonl to append one JSON line per call, or to anything else to log a summary table at exit.
+When off, instrumented methods make one extra function call and nothing else."""
+
+import atexit
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+import pandas as pd
+
+from ma.utils.io import get_logger
+
+LOG = get_logger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+INIT, READ, WRITE, VALIDATE, TRANSFORM = "init", "read", "write", "validate", "transform"
+
+
+def _frame_size(df: pd.DataFrame, deep: bool) -> Tuple[int, int]:
+    """(rows, bytes). Without deep, the contents of object columns (e.g. strings) aren't sized, which would take a pass
+    over every value."""
+    return len(df), int(df.memory_usage(index=True, deep=deep).sum())
+
+
+def _size(value: Any, deep: bool) -> Tuple[Optional[int], Optional[int]]:
+    """(rows, bytes) of a dataframe, loaded asset or file, as far as they're known"""
+    if isinstance(value, pd.DataFrame):
+        return _frame_size(value, deep)
+    if isinstance(value, tuple) and value and isinstance(value[0], pd.DataFrame):  # e.g. (dataframe, flag)
+        return _frame_size(value[0], deep)
+    if isinstance(value, Path):
+        return None, value.stat().st_size if value.exists() else None
+    if "_df_do_not_mutate" in getattr(value, "__dict__", {}):  # a DataFrameAsset, without loading it if lazy
+        return _frame_size(value.__dict__["_df_do_not_mutate"], deep)
+    return None, None
+
+
+class _Frame:
+    def __init__(self, peak_offset: int):
+        self.start = time.perf_counter()
+        self.validation_s = 0.0
+        self.peak_offset = peak_offset  # traced memory at the start of the call
+        self.peak_seen = 0  # highest traced memory before the last nested call reset the peak
+
+
+class Recorder:
+    def __init__(self, jsonl_path: Optional[Path] = None, trace_memory: bool = True, deep_sizes: bool = False):
+        self.jsonl_path = jsonl_path
+        self.trace_memory = trace_memory
+        self.deep_sizes = deep_sizes  # size the contents of object columns too
+        self.events: List[Dict] = []
+        self._stack: List[_Frame] = []
+        self._started_tracing = False
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _traced_memory(self) -> Tuple[int, int]:
+        return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+    def call(self, kind: str, name: str, method: Callable, instance: Any, args: tuple, kwargs: dict) -> Any:
+        current, peak = self._traced_memory()
+        if self._stack:
+            self._stack[-1].peak_seen = max(self._stack[-1].peak_seen, peak)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        frame = _Frame(peak_offset=current)
+        self._stack.append(frame)
+        try:
+            result = method(instance, *args, **kwargs)
+        finally:
+            self._stack.pop()
+            wall_s = time.perf_counter() - frame.start
+            peak_bytes = max(frame.peak_seen, self._traced_memory()[1]) - frame.peak_offset
+            if kind == VALIDATE:
+                for enclosing in self._stack:
+                    enclosing.validation_s += wall_s
+                frame.validation_s = wall_s
+
+        argument = args[0] if args else next(iter(kwargs.values()), None)
+        consumed, produced = {
+            INIT: (argument, instance),
+            WRITE: (instance, argument),
+            TRANSFORM: (instance, result),
+        }.get(kind, (argument, result))
+        rows_in, bytes_in = _size(consumed, self.deep_sizes)
+        rows_out, bytes_out = _size(produced, self.deep_sizes)
+        self.record(
+            dict(
+                name=name,
+                kind=kind,
+                wall_s=wall_s,
+                validation_s=frame.validation_s,
+                compute_s=wall_s - frame.validation_s,
+                rows_in=rows_in,
+                rows_out=rows_out,
+                bytes_in=bytes_in,
+                bytes_out=bytes_out,
+                peak_bytes=peak_bytes if tracemalloc.is_tracing() else None,
+            )
+        )
+        return result
+
+    def record(self, event: Dict) -> None:
+        self.events.append(event)
+        if self.jsonl_path is not None:
+            with open(self.jsonl_path, "a") as file:
+                file.write(json.dumps(event) + "\n")
+
+    def summary(self) -> pd.DataFrame:
+        """Totals per instrumented method, slowest first"""
+        if not self.events:
+            return pd.DataFrame()
+        events = pd.DataFrame(self.events)
+        return (
+            events.groupby(["name", "kind"])
+            .agg(
+                calls=("wall_s", "size"),
+                wall_s=("wall_s", "sum"),
+                validation_s=("validation_s", "sum"),
+                compute_s=("compute_s", "sum"),
+                rows_in=("rows_in", "sum"),
+                rows_out=("rows_out", "sum"),
+                bytes_out=("bytes_out", "sum"),
+                peak_bytes=("peak_bytes", "max"),
+            )
+            .sort_values("wall_s", ascending=False)
+        )
+
+
+_ACTIVE_RECORDER: Optional[Recorder] = None
+
+
+def set_recorder(recorder: Optional[Recorder]) -> Optional[Recorder]:
+    """Activate (or with None, deactivate) a recorder; returns the previously active one"""
+    global _ACTIVE_RECORDER
+    previous, _ACTIVE_RECORDER = _ACTIVE_RECORDER, recorder
+    if previous is not None and previous is not recorder:
+        previous.stop()
+    if recorder is not None:
+        recorder.start()
+    return previous
+
+
+def get_recorder() -> Optional[Recorder]:
+    return _ACTIVE_RECORDER
+
+
+@contextmanager
+def instrumentation(
+    jsonl_path: Optional[Path] = None, trace_memory: bool = True, deep_sizes: bool = False
+) -> Iterator[Recorder]:
+    recorder = Recorder(jsonl_path, trace_memory, deep_sizes)
+    previous = set_recorder(recorder)
+    try:
+        yield recorder
+    finally:
+        set_recorder(previous)
+
+
+def instrumented(kind: str) -> Callable[[F], F]:
+    """Record calls of a DataFrameAsset method in the active Recorder, if any"""
+
+    def decorator(method: F) -> F:
+        @functools.wraps(method)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            recorder = _ACTIVE_RECORDER
+            if recorder is None:
+                return method(self, *args, **kwargs)
+            return recorder.call(kind, f"{type(self).__name__}.{method.__name__}", method, self, args, kwargs)
+
+        setattr(wrapper, "__instrumented__", True)
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def is_instrumented(method: Any) -> bool:
+    return getattr(method, "__instrumented__", False)
+
+
+def _log_summary(recorder: Recorder) -> None:
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        LOG.info(f"Instrumentation summary:\n{recorder.summary()}")
+
+
+def _activate_from_env() -> None:
+    if not (setting := os.getenv("MA_INSTRUMENT")):
+        return
+    if setting.endswith(".jsonl"):
+        set_recorder(Recorder(jsonl_path=Path(setting)))
+    else:
+        recorder = Recorder()
+        set_recorder(recorder)
+        atexit.register(_log_summary, recorder)
+
+
+_activate_from_env()
@@ -1,75 +1,255 @@
 import copy
-import pickle
+import inspect
+import json
+import os
+import weakref
+from functools import cached_property
 from abc import ABC
 from pathlib import Path
-from typing import Any, Dict, NotRequired, TypedDict, Union
+from typing import Any, Callable, Dict, List, NamedTuple, NotRequired, Optional, Self, Tuple, TypedDict, Union
 
+import numpy as np
 import pandas as pd
 import pandera as pa
-import xxhash
+import pyarrow
+import pyarrow.parquet as pq
 from pandera.engines import pandas_engine
 
 from ma.utils.conf import get_code_version
+from ma.utils.hashing import hash_dataframe
+from ma.utils.instrumentation import INIT, READ, TRANSFORM, VALIDATE, WRITE, instrumented, is_instrumented
+from ma.utils.io import get_logger
+
+LOG = get_logger(__name__)
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+PARQUET_METADATA_KEY = b"ma"
+
+
+def is_parquet(filepath: Path) -> bool:
+    return filepath.suffix in PARQUET_SUFFIXES
+
+
+def sidecar_path(filepath: Path) -> Path:
+    """Where write() puts the metadata of an asset written to filepath"""
+    return filepath.with_name(filepath.name + ".meta.json")
+
+
+def qualified_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def file_stats(filepath: Path) -> Tuple[int, int]:
+    """(size, mtime in ns): cheap to get, and changed by any rewrite of the file"""
+    stat = os.stat(filepath)
+    return stat.st_size, stat.st_mtime_ns
 
 
 def select_columns(df: pd.DataFrame, exclude: list) -> pd.DataFrame:
     return df[[col for col in df.columns if col not in exclude]]
 
 
+def shallow_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy df without copying its data; axis labels are copied so that renaming them can't leak back"""
+    copied = df.copy(deep=False)
+    copied.index = copied.index.copy()
+    copied.columns = copied.columns.copy()
+    return copied
+
+
+def isolated_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy df such that writes to either copy can't reach the other.
+
+    Under pandas' copy-on-write, which applications opt in to with pd.set_option("mode.copy_on_write", True), copies
+    share data until either is written to, so no data is copied here. Otherwise, the data is copied."""
+    return shallow_copy(df) if pd.options.mode.copy_on_write is True else df.copy(deep=True)
+
+
 def DateTimeEngine(dayfirst: bool = True) -> pandas_engine.DateTime:
     # mypy doesn't recognize to_datetime_kwargs as a valid parameter, but it is at runtime
     return pandas_engine.DateTime(to_datetime_kwargs={"dayfirst": dayfirst})  # type: ignore
 
 
+def _ingest_arrow_schema(df: pd.DataFrame, metadata: Dict[bytes, bytes]) -> pyarrow.Schema:
+    """Arrow schema for every chunk of an ingest, taken from the first. Columns (or the categories of categorical
+    columns) that are all null there are typed as strings, which is what object columns hold."""
+    schema = pyarrow.Schema.from_pandas(df, preserve_index=True)
+    for i, field in enumerate(schema):
+        if pyarrow.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pyarrow.string()))
+        elif pyarrow.types.is_dictionary(field.type):  # later chunks may have more categories than fit the first's
+            value_type = pyarrow.string() if pyarrow.types.is_null(field.type.value_type) else field.type.value_type
+            schema = schema.set(i, field.with_type(pyarrow.dictionary(pyarrow.int32(), value_type)))
+    return schema.with_metadata((schema.metadata or {}) | metadata)
+
+
 class ColumnSchema(TypedDict):
     check: Union[pa.Column, pa.Check, pa.Index]
     keep: NotRequired[bool]
+    dtype: NotRequired[str]  # storage dtype applied after validation, e.g. "category", "int16" or "string[pyarrow]"
+
+
+def has_dtype(dtype: Any, expected: Any) -> bool:
+    """dtype == expected, except that an expected "category" matches any categorical"""
+    if isinstance(expected, pd.CategoricalDtype) and expected.categories is None:
+        return isinstance(dtype, pd.CategoricalDtype)
+    return dtype == expected
+
+
+class CompiledSchema(NamedTuple):
+    source: Dict[str, ColumnSchema]  # the schema this was compiled from
+    columns: Dict[str, pa.Column]
+    index_column: Dict  # {"check": pa.Index, "name": str}, or empty if no index is defined
+    pandera_schema: pa.DataFrameSchema
+    kept_pandera_schema: pa.DataFrameSchema  # validates kept columns only, e.g. of files read without the others
+    kept_columns: List[str]
+    storage_dtypes: Dict[str, Any]  # of kept columns that declare one
+
+
+def _pandera_schema(columns: Dict[str, pa.Column], index: Dict) -> pa.DataFrameSchema:
+    return pa.DataFrameSchema(columns=columns, index=index.get("check"), coerce=True, strict=True)
+
+
+def compile_schema(schema: Dict[str, ColumnSchema]) -> CompiledSchema:
+    columns: Dict = {}
+    index: Dict = {}
+    for col, column_schema in schema.items():
+        check = column_schema["check"]
+        if isinstance(check, pa.Column):
+            columns[col] = check
+        elif isinstance(check, pa.Index):
+            if len(index):
+                raise ValueError("More than one index column defined")
+            index = {"check": check, "name": col}
+        else:
+            raise ValueError("Columns must be of type pa.Column or pa.Index")
+
+    kept_columns = [col for col in columns if schema[col].get("keep", True)]
+    return CompiledSchema(
+        source=schema,
+        columns=columns,
+        index_column=index,
+        pandera_schema=_pandera_schema(columns, index),
+        kept_pandera_schema=_pandera_schema({col: columns[col] for col in kept_columns}, index),
+        kept_columns=kept_columns,
+        storage_dtypes={
+            col: pd.api.types.pandas_dtype(column_schema["dtype"])
+            for col, column_schema in schema.items()
+            if col in columns and column_schema.get("keep", True) and "dtype" in column_schema
+        },
+    )
+
+
+# Weakly keyed, so as not to keep alive classes defined on the fly, e.g. in tests
+_COMPILED_SCHEMAS: weakref.WeakKeyDictionary[type, CompiledSchema] = weakref.WeakKeyDictionary()
 
 
 class DataFrameAsset(ABC):
     schema: Dict[str, ColumnSchema]
     from_file_with_index: bool = True
     from_file_skiprows: int = 0
+    from_file_strict_audit: bool = False  # read and validate keep=False columns of files too, before dropping them
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Instrument transforms, and file readers overriding the default"""
+        super().__init_subclass__(**kwargs)
+        for name, method in list(vars(cls).items()):
+            if inspect.isfunction(method) and not is_instrumented(method):
+                if name.startswith("transform_to_"):
+                    setattr(cls, name, instrumented(TRANSFORM)(method))
+                elif name == "_read_from_file":
+                    setattr(cls, name, instrumented(READ)(method))
 
-    def __init__(self, input: Union[pd.DataFrame, Path]):
+    @instrumented(INIT)
+    def __init__(self, input: Union[pd.DataFrame, Path], lazy: bool = False, *, _validated: bool = False):
+        """
+        Args:
+            input: Dataframe, or path to a file, holding the data in schema order. Parquet files (chosen by extension)
+                are expected to have been written by this class; anything else is read as CSV by _read_from_file.
+            lazy: For a path, only record the file's size and mtime; it's read and validated on first access to the
+                data. Raises on that access if the file has changed since. Ignored for dataframes.
+            _validated: For use within ma only, on data taken from a validated asset of this class (e.g. a filter or
+                slice of one). Only column names, dtypes and index name are checked, skipping pandera coercion and
+                checks, so the caller guarantees that every row is valid.
+        """
         self._set_schema()
         if isinstance(input, pd.DataFrame):
-            df = input
+            object.__setattr__(self, "_df_do_not_mutate", self._init(input, _validated))
         elif isinstance(input, Path):
-            df = self._read_from_file(input)
+            self._path = input
+            self._path_stats = file_stats(input)
+            self._path_validated = _validated
+            if not lazy:
+                self._load()
         else:
             raise TypeError("Expected Pandas dataframe or pathlib.Path")
-        object.__setattr__(self, "_df_do_not_mutate", self._init_from_dataframe(df))
+
+    def _init(self, df: pd.DataFrame, validated: bool) -> pd.DataFrame:
+        return self._init_from_validated_dataframe(df) if validated else self._init_from_dataframe(df)
+
+    def _load(self) -> pd.DataFrame:
+        """Read, validate and store the data of an asset constructed from a path"""
+        path = self.__dict__.get("_path")
+        if path is None:  # called before __init__ got as far as recording the path
+            raise AttributeError("_df_do_not_mutate")
+        if file_stats(path) != self._path_stats:
+            raise RuntimeError(f"{path} has changed since this {type(self).__name__} was created")
+
+        validated = self._path_validated
+        if is_parquet(path):
+            df, written_by_this_class = self._read_from_parquet(path)
+            validated = validated or written_by_this_class
+        else:
+            df = self._read_from_file(path)
+        object.__setattr__(self, "_df_do_not_mutate", self._init(df, validated))
+        return self._df_do_not_mutate
+
+    @property
+    def is_loaded(self) -> bool:
+        return "_df_do_not_mutate" in self.__dict__
+
+    def _sidecar_metadata(self) -> Optional[Dict[str, str]]:
+        """Metadata written alongside the file this asset was constructed from, if it still describes that file"""
+        path = self.__dict__.get("_path")
+        if path is None:
+            return None
+        try:
+            sidecar = json.loads(sidecar_path(path).read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        if sidecar.get("type") != type(self).__name__ or (sidecar.get("size"), sidecar.get("mtime_ns")) != tuple(
+            self._path_stats
+        ):
+            return None
+        return sidecar["metadata"]
+
+    @classmethod
+    def compiled_schema(cls) -> CompiledSchema:
+        """Schema compiled once per class. Recompiled if cls.schema is reassigned, but not if mutated in place."""
+        compiled = _COMPILED_SCHEMAS.get(cls)
+        if compiled is None or compiled.source is not cls.schema:
+            compiled = _COMPILED_SCHEMAS[cls] = compile_schema(cls.schema)
+        return compiled
 
     def _set_schema(self) -> None:
-        self._columns: Dict = {}
-        self._index: Dict = {}
-        for col, column_schema in self.schema.items():
-            check = column_schema["check"]
-            if isinstance(check, pa.Column):
-                self._columns[col] = check
-            elif isinstance(check, pa.Index):
-                if len(self._index):
-                    raise ValueError("More than one index column defined")
-                self._index = {"check": check, "name": col}
-            else:
-                raise ValueError("Columns must be of type pa.Column or pa.Index")
-
-        self.pandera_schema = pa.DataFrameSchema(
-            columns=self._columns,
-            index=self._index.get("check"),
-            coerce=True,
-            strict=True,
-        )
+        compiled = self.compiled_schema()
+        self._columns: Dict = compiled.columns
+        self._index: Dict = compiled.index_column
+        self.pandera_schema = compiled.pandera_schema
 
+    @instrumented(VALIDATE)
     def _init_from_dataframe(self, dataframe: pd.DataFrame) -> pd.DataFrame:
-        dataframe = copy.deepcopy(dataframe)
+        dataframe = isolated_copy(dataframe)  # so that later writes by the caller to its dataframe don't reach this one
 
-        # Name columns
-        column_names = pd.Index(self._columns.keys())
-        if len(self._columns) != len(dataframe.columns):
+        # Name columns. Dataframes may hold all columns of the schema, or only those kept (e.g. read from file).
+        compiled = self.compiled_schema()
+        if len(dataframe.columns) == len(self._columns):
+            column_names, pandera_schema = pd.Index(self._columns.keys()), self.pandera_schema
+        elif len(dataframe.columns) == len(compiled.kept_columns):
+            column_names, pandera_schema = pd.Index(compiled.kept_columns), compiled.kept_pandera_schema
+        else:
             raise AssertionError(
-                f"Dataframe has wrong number of columns: schema has {len(column_names)}, dataframe has {len(dataframe.columns)}"
+                f"Dataframe has wrong number of columns: schema has {len(self._columns)}, dataframe has {len(dataframe.columns)}"
             )
         dataframe.columns = column_names
 
@@ -78,24 +258,193 @@ class DataFrameAsset(ABC):
             dataframe.index.name = index_name
 
         # Apply schema
-        dataframe = self.pandera_schema.validate(dataframe)
+        dataframe = pandera_schema.validate(dataframe)
 
         # Drop columns
         dataframe = select_columns(
             dataframe, exclude=[col for col, cs in self.schema.items() if not cs.get("keep", True)]
         )
 
+        # Compact storage
+        if storage_dtypes := compiled.storage_dtypes:
+            dataframe = dataframe.astype(storage_dtypes)
+
         return dataframe
 
-    def _read_from_file(self, filepath: Path) -> pd.DataFrame:
-        return pd.read_csv(
-            filepath,
-            index_col=0 if self.from_file_with_index else None,
-            skiprows=self.from_file_skiprows,
+    @instrumented(VALIDATE)
+    def _init_from_validated_dataframe(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        dataframe = isolated_copy(dataframe)
+        compiled = self.compiled_schema()
+
+        # Check shape
+        if list(dataframe.columns) != compiled.kept_columns:
+            raise AssertionError(
+                f"Dataframe columns don't match schema: schema has {compiled.kept_columns}, dataframe has {list(dataframe.columns)}"
+            )
+        if (index_name := compiled.index_column.get("name")) and dataframe.index.name != index_name:
+            raise AssertionError(f"Dataframe index is named {dataframe.index.name}, schema expects {index_name}")
+
+        # Check dtypes
+        checks = {
+            col: (compiled.columns[col], dataframe[col].dtype)
+            for col in compiled.kept_columns
+            if col not in compiled.storage_dtypes
+        }
+        if index_name:
+            checks[index_name] = (compiled.index_column["check"], dataframe.index.dtype)
+        for col, (check, dtype) in checks.items():
+            if check.dtype is not None and not check.dtype.check(pandas_engine.Engine.dtype(dtype)):
+                raise AssertionError(f"Column {col} has dtype {dtype}, schema expects {check.dtype}")
+        for col, storage_dtype in compiled.storage_dtypes.items():
+            if not has_dtype(dataframe[col].dtype, storage_dtype):
+                raise AssertionError(f"Column {col} has dtype {dataframe[col].dtype}, schema expects {storage_dtype}")
+
+        return dataframe
+
+    @classmethod
+    def _kept_positions(cls) -> List[int]:
+        """Positions of kept columns among the schema's columns, i.e. those to read from files"""
+        compiled = cls.compiled_schema()
+        return [i for i, col in enumerate(compiled.columns) if col in compiled.kept_columns]
+
+    @classmethod
+    def _csv_options(cls) -> Dict[str, Any]:
+        options: Dict[str, Any] = dict(
+            index_col=0 if cls.from_file_with_index else None,
+            skiprows=cls.from_file_skiprows,
             header=None,
         )
+        if not cls.from_file_strict_audit and len(cls.compiled_schema().kept_columns) < len(
+            cls.compiled_schema().columns
+        ):
+            offset = 1 if cls.from_file_with_index else 0  # the index is the first column of the file
+            options["usecols"] = list(range(offset)) + [i + offset for i in cls._kept_positions()]
+        return options
+
+    @classmethod
+    def _csv_str_columns(cls) -> Dict[int, type]:
+        """Positions in the file of columns the schema types as str. Types inferred from only part of a file can
+        differ from those of the whole: a chunk holding just numbers in a str column would be coerced to "1.0".
+        """
+        compiled = cls.compiled_schema()
+        checks: List[Any] = list(compiled.columns.values())
+        if cls.from_file_with_index:
+            checks.insert(0, compiled.index_column.get("check"))
+        str_dtype = pandas_engine.Engine.dtype(str)
+        return {
+            i: str
+            for i, check in enumerate(checks)
+            if check is not None and check.dtype is not None and check.dtype.check(str_dtype)
+        }
+
+    @instrumented(READ)
+    def _read_from_file(self, filepath: Path) -> pd.DataFrame:
+        return pd.read_csv(filepath, **self._csv_options())
+
+    @classmethod
+    def ingest_csv(
+        cls,
+        input_path: Path,
+        output_path: Path,
+        chunksize: int = 100_000,
+        row_filter: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+    ) -> Self:
+        """Validate a CSV chunk by chunk into a Parquet file, so that peak memory depends on chunksize, not file size.
+
+        Each chunk is validated and coerced as a whole file would be, columns with keep=False are dropped, and rows
+        for which row_filter (given a validated chunk) is False are left out. Returns a lazy asset of output_path.
+
+        Classes that override _read_from_file are read whole instead, with a warning.
+        """
+        tmp_path = output_path.with_name(f".{output_path.name}.tmp")  # renamed once complete: no output on failure
+        if cls._read_from_file is not DataFrameAsset._read_from_file:
+            LOG.warning(f"{cls.__name__} reads files its own way, which can't be chunked: reading {input_path} whole")
+            asset = cls(input_path)
+            if row_filter is not None:
+                view = asset.view
+                asset = cls(view[row_filter(view)], _validated=True)
+            try:
+                asset._write_to_parquet(tmp_path)
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+            os.replace(tmp_path, output_path)
+            return cls(output_path, lazy=True)
+
+        writer: Optional[pq.ParquetWriter] = None
+        arrow_schema: Optional[pyarrow.Schema] = None
+        try:
+            for chunk in pd.read_csv(
+                input_path, chunksize=chunksize, dtype=cls._csv_str_columns(), **cls._csv_options()
+            ):
+                df = cls(chunk).view
+                if row_filter is not None:
+                    df = df[row_filter(df)]
+                if writer is None:
+                    arrow_schema = _ingest_arrow_schema(df, cls._parquet_metadata(df))
+                    writer = pq.ParquetWriter(tmp_path, arrow_schema)
+                writer.write_table(pyarrow.Table.from_pandas(df, schema=arrow_schema, preserve_index=True))
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            raise ValueError(f"{input_path} holds no rows")
+        os.replace(tmp_path, output_path)
+        return cls(output_path, lazy=True)
+
+    @instrumented(READ)
+    def _read_from_parquet(self, filepath: Path) -> Tuple[pd.DataFrame, bool]:
+        """Return the typed dataframe, and whether it was written by this class with its current schema (and so needs
+        no coercion)"""
+        table = pq.read_table(filepath)
+        df = table.to_pandas()
+        for col in df.select_dtypes(object).columns:  # nulls of str columns are written as NaN, but read as None
+            df[col] = df[col].mask(df[col].isna(), np.nan)
+        if not (table.schema.metadata and PARQUET_METADATA_KEY in table.schema.metadata):
+            return df, False
+
+        metadata = json.loads(table.schema.metadata[PARQUET_METADATA_KEY])
+        if metadata["type"] != qualified_name(type(self)):
+            raise ValueError(f"{filepath} holds a {metadata['type']}, not a {qualified_name(type(self))}")
+        df.index.name = metadata["index"]
+        return df, metadata.get("schema") == self._schema_description()
+
+    @classmethod
+    def _schema_description(cls) -> Dict[str, Dict[str, Any]]:
+        """The schema as JSON: each column's checked dtype, and whether it's the index, kept, and its storage dtype"""
+        description = {}
+        for col, cs in cls.schema.items():
+            dtype = getattr(cs["check"], "dtype", None)
+            description[col] = dict(
+                check=None if dtype is None else str(dtype),
+                index=isinstance(cs["check"], pa.Index),
+                keep=cs.get("keep", True),
+                dtype=cs.get("dtype"),
+            )
+        return description
+
+    @classmethod
+    def _parquet_metadata(cls, df: pd.DataFrame) -> Dict[bytes, bytes]:
+        metadata = dict(
+            type=qualified_name(cls),
+            schema=cls._schema_description(),
+            index=df.index.name,
+            columns={col: str(dtype) for col, dtype in df.dtypes.items()},
+        )
+        return {PARQUET_METADATA_KEY: json.dumps(metadata).encode()}
+
+    def _write_to_parquet(self, filepath: Path) -> None:
+        df = self._df_do_not_mutate
+        table = pyarrow.Table.from_pandas(df)
+        table = table.replace_schema_metadata((table.schema.metadata or {}) | self._parquet_metadata(df))
+        pq.write_table(table, filepath)
 
     def __getattr__(self, name: str) -> Any:
+        if name == "_df_do_not_mutate":  # not loaded yet
+            return self._load()
         return self._df_do_not_mutate[name]
 
     def __getitem__(self, key: str) -> Any:
@@ -108,21 +457,50 @@ class DataFrameAsset(ABC):
 
     @property
     def df(self) -> pd.DataFrame:
+        """Deep copy of the data, free to be mutated"""
         return self._df_do_not_mutate.copy(deep=True)
 
     @property
-    def metadata(self) -> Dict[str, str]:
-        df = self.df
-        hasher = xxhash.xxh64()
-        numpy_obj = df.to_numpy()  # improves performance
-        hasher.update(pickle.dumps(numpy_obj, protocol=4))  # protocol 4 is more efficient for large data
-        hash = hasher.hexdigest()
+    def view(self) -> pd.DataFrame:
+        """View of the data, which writes (e.g. `.loc[...] = `, `+=`, new columns) never reach the asset.
+
+        Zero-copy under pandas' copy-on-write (see isolated_copy), where writes to the view copy only what they
+        change; a deep copy, like `.df`, otherwise."""
+        return isolated_copy(self._df_do_not_mutate)
 
-        return dict(type=type(self).__name__, rows=str(len(df)), hash=hash, ma_version=get_code_version())
+    @cached_property
+    def content_hash(self) -> str:
+        """Column-wise hash of the data, computed once per (immutable) asset"""
+        if not self.is_loaded and (sidecar := self._sidecar_metadata()):
+            return sidecar["hash"]
+        return hash_dataframe(self._df_do_not_mutate)
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        """Taken from the sidecar written by write(with_sidecar=True), if any, rather than loading a lazy asset"""
+        if not self.is_loaded and (sidecar := self._sidecar_metadata()):
+            return sidecar
+        return dict(
+            type=type(self).__name__,
+            rows=str(len(self._df_do_not_mutate)),
+            hash=self.content_hash,
+            ma_version=get_code_version(),
+        )
 
     @classmethod
     def schema_copy(cls) -> Dict[str, ColumnSchema]:
         return copy.deepcopy(cls.schema)
 
-    def write(self, filepath: Path) -> None:
-        self.pandera_schema.validate(self._df_do_not_mutate).to_csv(filepath)
+    @instrumented(WRITE)
+    def write(self, filepath: Path, with_sidecar: bool = False) -> None:
+        """Write to Parquet (typed, restored without coercion) or CSV, depending on the file extension.
+
+        with_sidecar also writes metadata to sidecar_path(filepath), from which lazy assets read it without a load."""
+        if is_parquet(filepath):
+            self._write_to_parquet(filepath)
+        else:
+            self.compiled_schema().kept_pandera_schema.validate(self._df_do_not_mutate).to_csv(filepath)
+        if with_sidecar:
+            size, mtime_ns = file_stats(filepath)
+            sidecar = dict(type=type(self).__name__, size=size, mtime_ns=mtime_ns, metadata=self.metadata)
+            sidecar_path(filepath).write_text(json.dumps(sidecar))
@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+
+import data.register
+from ma.elexon.S0142 import dataset
+from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+from ma.mapper.bmu_helpers import get_bmu_volumes_by_month
+
+GOLD_CSVS = {
+    "S0142_20230330_SF_20230425121906": data.register.S0142_20230330_SF_20230425121906_GOLD_CSV,
+    "S0142_20230331_SF_20230426191253": data.register.S0142_20230331_SF_20230426191253_GOLD_CSV,
+}
+
+
+def write_gold_dataset(root: Path) -> None:
+    for name, gold_csv in GOLD_CSVS.items():
+        for written_path, output_path in dataset.write_processed(ProcessedS0142(gold_csv), root, name):
+            os.replace(written_path, output_path)
+
+
+def test_write_processed_partitions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(dataset, "ROW_GROUP_SIZE", 2 * 48)
+    write_gold_dataset(tmp_path)
+    assert dataset.is_dataset(tmp_path)
+    assert sorted(str(path.relative_to(tmp_path)) for path in tmp_path.rglob("*.parquet")) == [
+        "settlement_month=2023-03/bsc=GOLD/settlement_run_type=SF/S0142_20230330_SF_20230425121906.parquet",
+        "settlement_month=2023-03/bsc=GOLD/settlement_run_type=SF/S0142_20230331_SF_20230426191253.parquet",
+    ]
+
+    # Rows are sorted by BM unit, so a BM unit's rows are in few row groups and the others can be skipped
+    fragment = next(ds.dataset(tmp_path, format="parquet", partitioning=dataset.PARTITIONING).get_fragments())
+    assert fragment.metadata.num_row_groups == 7
+    assert len(fragment.split_by_row_group(ds.field("bm_unit_id") == "2__AGESL000")) == 1
+
+
+def test_read_processed(tmp_path: Path) -> None:
+    write_gold_dataset(tmp_path)
+    expected = pd.concat([ProcessedS0142(gold_csv).df for gold_csv in GOLD_CSVS.values()], ignore_index=True)
+    expected = expected.sort_values(["settlement_period", "bm_unit_id"], kind="stable")  # per day
+
+    pd.testing.assert_frame_equal(
+        dataset.read_processed(tmp_path).df,
+        ProcessedS0142(
+            expected.sort_values("settlement_date", key=lambda d: pd.to_datetime(d, dayfirst=True), kind="stable")
+        ).df,
+    )
+
+    one_day = dataset.read_processed(tmp_path, start=pd.Timestamp("2023-03-31"), end=pd.Timestamp("2023-04-01"))
+    assert set(one_day["settlement_date"]) == {"31/03/2023"}
+    assert len(dataset.read_processed(tmp_path, bsc_party_ids=["OTHER"]).df) == 0
+
+    one_bmu = dataset.read_processed(tmp_path, bm_unit_ids=["2__AGESL000"], settlement_run_types=["SF"])
+    assert set(one_bmu["bm_unit_id"]) == {"2__AGESL000"}
+    assert len(one_bmu.df) == 2 * 48
+
+
+def test_get_bmu_volumes_by_month_from_dataset(tmp_path: Path) -> None:
+    write_gold_dataset(tmp_path / "dataset")
+    (tmp_path / "csv" / "GOLD").mkdir(parents=True)
+    for gold_csv in GOLD_CSVS.values():
+        (tmp_path / "csv" / "GOLD" / gold_csv.name).write_bytes(gold_csv.read_bytes())
+
+    pd.testing.assert_frame_equal(
+        get_bmu_volumes_by_month("GOLD", ["2__AGESL000", "2__BGESL000"], tmp_path / "dataset"),
+        get_bmu_volumes_by_month("GOLD", ["2__AGESL000", "2__BGESL000"], tmp_path / "csv"),
+    )
+
+
+def test_read_processed_resolves_settlement_runs(tmp_path: Path) -> None:
+    write_gold_dataset(tmp_path)
+    restated = ProcessedS0142(data.register.S0142_20230330_SF_20230425121906_GOLD_CSV).df
+    restated["settlement_run_type"] = "R1"
+    restated["bm_unit_metered_volume_mwh"] += 1
+    for written_path, output_path in dataset.write_processed(
+        ProcessedS0142(restated), tmp_path, "S0142_20230330_R1_20230601120000"
+    ):
+        os.replace(written_path, output_path)
+
+    assert len(dataset.read_processed(tmp_path).df) == 3 * 672
+    latest = dataset.read_processed(tmp_path, settlement_run="latest")
+    assert len(latest.df) == 2 * 672
+    assert latest.df.groupby("settlement_date", observed=True)["settlement_run_type"].unique().to_dict() == {
+        "30/03/2023": ["R1"],
+        "31/03/2023": ["SF"],
+    }
+    assert len(dataset.read_processed(tmp_path, settlement_run="SF").df) == 2 * 672
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import data.register
+from ma.elexon.S0142 import dataset, deltas
+from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+
+SF_CSV = data.register.S0142_20230330_SF_20230425121906_GOLD_CSV
+R1_NAME = "S0142_20230330_R1_20230601120000"
+
+
+def restated() -> pd.DataFrame:
+    """The SF run of 30/03/2023 with two volumes restated, a row removed and a row added"""
+    df = ProcessedS0142(SF_CSV).df
+    df["settlement_run_type"] = "R1"
+    df.loc[[0, 5], "bm_unit_metered_volume_mwh"] += [1.0, -2.0]
+    added = df.iloc[[0]].assign(bm_unit_id="2__NEW000", bm_unit_metered_volume_mwh=3.0)
+    return pd.concat([df.drop(index=10), added], ignore_index=True)
+
+
+def test_diff() -> None:
+    base = ProcessedS0142(SF_CSV).df
+    removed_volume = float(base["bm_unit_metered_volume_mwh"].iloc[10])
+    changes = deltas.diff(base, restated())
+    assert sorted(changes["change"]) == ["added", "changed", "changed", "removed"]
+    assert changes["bm_unit_metered_volume_mwh_delta"].sum() == pytest.approx(1.0 - 2.0 + 3.0 - removed_volume)
+    removed = changes[changes["change"] == "removed"].iloc[0]
+    assert removed["bm_unit_id"] == base.loc[10, "bm_unit_id"]
+    assert pd.isna(removed["bm_unit_metered_volume_mwh_compare"])
+    assert removed["trading_unit_name_base"] == base.loc[10, "trading_unit_name"]
+
+    assert len(deltas.diff(base, base.assign(settlement_run_type="R1"))) == 0  # the run type isn't a change
+
+
+def test_run_deltas(tmp_path: Path) -> None:
+    (tmp_path / "csv").mkdir()
+    (tmp_path / "csv" / SF_CSV.name).write_bytes(SF_CSV.read_bytes())
+    restated().to_csv(tmp_path / "csv" / f"{R1_NAME}_GOLD.csv", index=False)
+    other_day = data.register.S0142_20230331_SF_20230426191253_GOLD_CSV  # only one run: nothing to compare
+    (tmp_path / "csv" / other_day.name).write_bytes(other_day.read_bytes())
+
+    summary = deltas.DeltaSummary()
+    from_csv = [summary.add(changes) for changes in deltas.run_deltas(list((tmp_path / "csv").iterdir()), "SF")]
+    assert len(from_csv) == 1
+    assert len(from_csv[0]) == 4
+    by_day = summary.by_day()
+    assert list(by_day.index) == ["30/03/2023"]
+    assert by_day[["rows_added", "rows_removed", "rows_changed"]].to_numpy().tolist() == [[1, 1, 2]]
+    by_bmu = summary.by_bmu()
+    assert by_bmu.loc["2__NEW000", "volume_delta_mwh"] == 3.0
+    assert by_bmu["volume_delta_mwh"].sum() == pytest.approx(from_csv[0]["bm_unit_metered_volume_mwh_delta"].sum())
+
+    for path in (tmp_path / "csv").iterdir():
+        name = path.name.removesuffix("_GOLD.csv")
+        for written_path, output_path in dataset.write_processed(ProcessedS0142(path), tmp_path / "dataset", name):
+            os.replace(written_path, output_path)
+    from_dataset = list(deltas.run_deltas(list((tmp_path / "dataset").rglob("*.parquet")), "SF", "R1"))
+    pd.testing.assert_frame_equal(
+        from_dataset[0][["change", "bm_unit_metered_volume_mwh_delta"]],
+        from_csv[0][["change", "bm_unit_metered_volume_mwh_delta"]],
+    )
+
+
+def test_run_deltas_parties_in_one_directory(tmp_path: Path) -> None:
+    sf_name = SF_CSV.name.removesuffix("_GOLD.csv")
+    unchanged = ProcessedS0142(SF_CSV).df
+    for bsc in ["AAAA", "GOLD"]:
+        unchanged.assign(bsc=bsc).to_csv(tmp_path / f"{sf_name}_{bsc}.csv", index=False)
+    restated().assign(bsc="AAAA").to_csv(tmp_path / f"{R1_NAME}_AAAA.csv", index=False)  # sorts first
+    unchanged.assign(bsc="GOLD", settlement_run_type="R1").to_csv(tmp_path / f"{R1_NAME}_GOLD.csv", index=False)
+
+    changes = list(deltas.run_deltas(list(tmp_path.iterdir()), "SF", "R1"))
+    assert [len(c) for c in changes] == [4, 0]  # a diff per party
+    assert set(changes[0]["bsc_compare"].dropna()) == {"AAAA"}
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from ma.elexon.S0142 import downloader
+
+FILES = {
+    "2023-03-30": {"S0142_20230330_SF_20230425121906.gz": b"a" * 10_000, "S0142_20230330_R1_20230601.gz": b"r"},
+    "2023-03-31": {"S0142_20230331_SF_20230426191253.gz": b"b" * 10_000},
+}
+
+UNLISTABLE_DATES = {"2023-04-01"}
+
+
+class StandInPortal(BaseHTTPRequestHandler):
+    """Serves /list and /download like the Elexon portal, but fails the first request of each file: with a 503 for
+    the first day's file, and by dropping the connection halfway through for the others. Listing a day in
+    UNLISTABLE_DATES always fails."""
+
+    requests: Counter = Counter()
+    ranges: Dict[str, str] = {}
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        assert query["key"] == "test-key"
+        if url.path.endswith("/list") and query["date"] in UNLISTABLE_DATES:
+            return self.send_body(b"", status=500)
+        if url.path.endswith("/list"):
+            return self.send_body(
+                json.dumps({name: len(content) for name, content in FILES.get(query["date"], {}).items()}).encode()
+            )
+
+        filename = query["filename"]
+        content = next(files[filename] for files in FILES.values() if filename in files)
+        StandInPortal.requests[filename] += 1
+        if StandInPortal.requests[filename] == 1 and filename.startswith("S0142_20230330"):
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif StandInPortal.requests[filename] == 1:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content[: len(content) // 2])
+            self.close_connection = True
+        elif range_header := self.headers.get("Range"):
+            StandInPortal.ranges[filename] = range_header
+            offset = int(range_header.removeprefix("bytes=").removesuffix("-"))
+            self.send_body(content[offset:], status=206)
+        else:
+            self.send_body(content)
+
+    def send_body(self, body: bytes, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def portal_url() -> Iterator[str]:
+    StandInPortal.requests, StandInPortal.ranges = Counter(), {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInPortal)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/p114"
+    server.shutdown()
+    server.server_close()
+
+
+def test_download(portal_url: str, tmp_path: Path) -> None:
+    def download() -> list[str]:
+        return downloader.download(
+            pd.Timestamp("2023-03-30"),
+            pd.Timestamp("2023-04-01"),
+            tmp_path,
+            api_key="test-key",
+            base_url=portal_url,
+            backoff_s=0.01,
+            requests_per_second=None,
+        )
+
+    assert download() == []
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "S0142_20230330_SF_20230425121906.gz",
+        "S0142_20230331_SF_20230426191253.gz",
+    ]
+    assert (tmp_path / "S0142_20230330_SF_20230425121906.gz").read_bytes() == b"a" * 10_000
+    assert (tmp_path / "S0142_20230331_SF_20230426191253.gz").read_bytes() == b"b" * 10_000
+    assert StandInPortal.ranges == {"S0142_20230331_SF_20230426191253.gz": "bytes=5000-"}  # resumed
+
+    download()  # done already
+    assert sum(StandInPortal.requests.values()) == 4
+
+
+def test_download_gives_up(portal_url: str, tmp_path: Path) -> None:
+    failed = downloader.download(
+        pd.Timestamp("2023-03-30"),
+        pd.Timestamp("2023-03-31"),
+        tmp_path,
+        api_key="test-key",
+        base_url=portal_url,
+        retries=0,
+        requests_per_second=None,
+    )
+    assert failed == ["S0142_20230330_SF_20230425121906.gz"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_download_listing_fails(portal_url: str, tmp_path: Path) -> None:
+    failed = downloader.download(
+        pd.Timestamp("2023-03-31"),
+        pd.Timestamp("2023-04-02"),
+        tmp_path,
+        api_key="test-key",
+        base_url=portal_url,
+        retries=1,
+        backoff_s=0.01,
+        requests_per_second=None,
+    )
+    assert failed == ["listing of 2023-04-01"]
+    assert [path.name for path in tmp_path.iterdir()] == ["S0142_20230331_SF_20230426191253.gz"]  # other days go on
+
+
+def test_rate_limiter() -> None:
+    async def wait_five_times() -> float:
+        rate_limiter = downloader.RateLimiter(per_second=50)
+        start = time.monotonic()
+        await asyncio.gather(*[rate_limiter.wait() for _ in range(5)])
+        return time.monotonic() - start
+
+    assert asyncio.run(wait_five_times()) >= 4 / 50
@@ -0,0 +1,82 @@
+import gzip
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from ma.elexon.S0142 import gzip_index, processed_S0142
+
+
+def bp7(bm_unit_id: str, volume: float) -> str:
+    return f"BP7|{bm_unit_id}|1.0|0.0|0.0|0.0|0.0|0.0|{volume}|0.0|0.0|0.98|0.99|TU1|{volume}|0.0|0.0|0.0|"
+
+
+def write_S0142_gz(filepath: Path, parties: list[str]) -> None:
+    lines = ["AAA|S0142|", "SRH|20230330|SF|"]
+    for i, bsc in enumerate(parties):
+        lines.append(f"BPH||||||||{bsc}|")
+        for settlement_period in range(1, 49):
+            lines += [f"SP7|{settlement_period}|", bp7(f"2__{bsc}00{i}", settlement_period * 0.5)]
+    lines.append("ZZZ|")
+    with gzip.open(filepath, "wt") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def test_build_index(tmp_path: Path) -> None:
+    write_S0142_gz(tmp_path / "S0142.gz", ["AAAA", "BBBB", "CCCC"])
+    content = gzip.decompress((tmp_path / "S0142.gz").read_bytes())
+    expected = {bsc: load for bsc, load in processed_S0142.process_file(tmp_path / "S0142.gz", ["all!"])}
+
+    with pytest.raises(ValueError):
+        gzip_index.build_index(tmp_path / "S0142.gz")  # neither an output path nor in place
+    gzip_index.build_index(tmp_path / "S0142.gz", in_place=True)
+    assert gzip.decompress((tmp_path / "S0142.gz").read_bytes()) == content  # still one gzip file, unchanged
+    index = gzip_index.read_index(tmp_path / "S0142.gz")
+    assert index is not None
+    assert [bsc for bsc, _, _ in index["sections"]] == ["AAAA", "BBBB", "CCCC"]
+
+    with patch("gzip.open", wraps=gzip.open) as gzip_open:
+        bsc_dfs = dict(processed_S0142.process_file(tmp_path / "S0142.gz", ["BBBB"]))
+    assert gzip_open.call_count == 2  # the header and BBBB's section only
+    assert list(bsc_dfs) == ["BBBB"]
+    pd.testing.assert_frame_equal(bsc_dfs["BBBB"], expected["BBBB"])
+
+    all_bsc_dfs = dict(processed_S0142.process_file(tmp_path / "S0142.gz", ["all!"]))
+    assert list(all_bsc_dfs) == ["AAAA", "BBBB", "CCCC"]
+
+
+def test_stale_index_ignored(tmp_path: Path) -> None:
+    write_S0142_gz(tmp_path / "S0142.gz", ["AAAA", "BBBB"])
+    gzip_index.build_index(tmp_path / "S0142.gz", in_place=True)
+    write_S0142_gz(tmp_path / "S0142.gz", ["CCCC", "BBBB", "AAAA"])
+    os.utime(tmp_path / "S0142.gz", ns=(0, 0))
+
+    assert gzip_index.read_index(tmp_path / "S0142.gz") is None
+    assert list(dict(processed_S0142.process_file(tmp_path / "S0142.gz", ["AAAA"]))) == ["AAAA"]
+
+
+def test_main(tmp_path: Path) -> None:
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir()
+    write_S0142_gz(input_dir / "S0142_20230330_SF_1.gz", ["AAAA", "BBBB"])
+    downloaded = (input_dir / "S0142_20230330_SF_1.gz").read_bytes()
+
+    gzip_index.main(input_dir, output_dir)
+    assert [path.name for path in input_dir.iterdir()] == ["S0142_20230330_SF_1.gz"]
+    assert (input_dir / "S0142_20230330_SF_1.gz").read_bytes() == downloaded  # the download is left as it was
+    assert sorted(path.name for path in output_dir.iterdir()) == [
+        "S0142_20230330_SF_1.gz",
+        "S0142_20230330_SF_1.gz.index.json",
+    ]
+
+    with patch("ma.elexon.S0142.gzip_index.build_index") as build_index:
+        gzip_index.main(input_dir, output_dir)
+    build_index.assert_not_called()  # indexed already
+
+    gzip_index.main(input_dir)
+    assert sorted(path.name for path in input_dir.iterdir()) == [
+        "S0142_20230330_SF_1.gz",
+        "S0142_20230330_SF_1.gz.index.json",
+    ]
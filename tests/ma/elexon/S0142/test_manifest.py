@@ -0,0 +1,73 @@
+import datetime
+import os
+from pathlib import Path
+
+import pandas as pd
+
+import data.register
+from ma.elexon.S0142 import manifest
+
+
+def test_manifest_ignores_partial_output(tmp_path: Path) -> None:
+    (tmp_path / "S0142_20230330_SF_1.gz").write_bytes(
+        data.register.S0142_20230330_SF_20230425121906_GOLD_CSV.read_bytes()
+    )
+    (tmp_path / "S0142_20230330_SF_1_GOLD.csv").write_text("partial")
+    assert not manifest.Manifest(tmp_path).is_processed(tmp_path / "S0142_20230330_SF_1.gz")
+
+    with open(tmp_path / manifest.MANIFEST_FILENAME, "w") as file:
+        file.write('{"input": "S0142_20230330_SF_1.gz", "si')  # cut short by a crash
+    assert manifest.Manifest(tmp_path).entries == {}
+
+
+def test_manifest_detects_changed_contents(tmp_path: Path) -> None:
+    input_path = tmp_path / "S0142_20230330_SF_1.gz"
+    input_path.write_bytes(b"original")
+    catalogue = manifest.Manifest(tmp_path)
+    stat = input_path.stat()
+    catalogue.record(
+        dict(
+            input=input_path.name,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            checksum=manifest.file_checksum(input_path),
+            parties={},
+        )
+    )
+    assert catalogue.is_processed(input_path)
+
+    os.utime(input_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))  # touched, but the same contents
+    assert catalogue.is_processed(input_path)
+
+    input_path.write_bytes(b"reissued")  # the same size
+    assert not catalogue.is_processed(input_path)
+
+
+def test_manifest_missing_dates(tmp_path: Path) -> None:
+    catalogue = manifest.Manifest(tmp_path)
+    for day, parties, run_type in [
+        ("2023-03-01", {"GOLD": 10, "OTHER": 5}, "SF"),
+        ("2023-03-02", {"OTHER": 5}, "SF"),
+        ("2023-03-03", {"GOLD": 0}, "SF"),
+        ("2023-03-04", {"GOLD": 10}, "R1"),
+    ]:
+        catalogue.record(
+            dict(input=f"S0142_{day}.gz", size=1, settlement_date=day, settlement_run_type=run_type, parties=parties)
+        )
+
+    reloaded = manifest.Manifest(tmp_path)
+    assert reloaded.entries.keys() == catalogue.entries.keys()
+    start, end = pd.Timestamp("2023-03-01"), pd.Timestamp("2023-03-06")
+    assert reloaded.missing_dates("GOLD", start, end) == [
+        datetime.date(2023, 3, 2),
+        datetime.date(2023, 3, 3),
+        datetime.date(2023, 3, 5),
+    ]
+    assert datetime.date(2023, 3, 4) in reloaded.missing_dates("GOLD", start, end, settlement_run_types=["SF"])
+
+
+def test_parse_filename() -> None:
+    assert manifest.parse_filename("S0142_20230330_SF_20230425121906.gz") == dict(
+        settlement_date="2023-03-30", settlement_run_type="SF"
+    )
+    assert manifest.parse_filename("other.gz") == dict(settlement_date=None, settlement_run_type=None)
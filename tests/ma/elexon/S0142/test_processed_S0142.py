@@ -1,3 +1,4 @@
+import gzip
 from pathlib import Path
 from typing import Dict, List
 from unittest.mock import MagicMock, patch
@@ -7,7 +8,7 @@ import pandas as pd
 import pytest
 
 import data.register
-from ma.elexon.S0142 import processed_S0142
+from ma.elexon.S0142 import dataset, manifest, processed_S0142
 
 
 def run_process_file(bsc_party_ids: List[str]) -> Dict[str, pd.DataFrame]:
@@ -48,20 +49,142 @@ def test_process_file() -> None:
         assert isinstance(S0142_df[expected_col].iloc[0], expected_type)
 
 
-@patch("os.listdir")
-@patch("glob.glob")
-def test_main(mock_glob: MagicMock, mock_listdir: MagicMock) -> None:
-    mock_listdir.return_value = ["S0142_file1.csv.gz", "S0142_file2.csv.gz"]
-    mock_glob.return_value = []
-    mock_process_file = MagicMock(return_value=[("BSC1", MagicMock())])
+def test_main(tmp_path: Path) -> None:
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    for filename in ["S0142_file1.csv.gz", "S0142_file2.csv.gz"]:
+        (input_dir / filename).write_bytes(filename.encode())
+    load = pd.read_csv(data.register.S0142_20230330_SF_20230425121906_GOLD_CSV, dtype=str)
+    mock_process_file = MagicMock(return_value=[("BSC1", load)])
 
     with patch("ma.elexon.S0142.processed_S0142.process_file", mock_process_file):
-        processed_S0142.process_directory(
-            input_dir=Path("/fake/input"),
-            output_dir=Path("/fake/output"),
+        failed = processed_S0142.process_directory(
+            input_dir=input_dir,
+            output_dir=output_dir,
             bsc_party_ids=["BSC1", "BSC2"],
         )
 
+        assert failed == []
         assert mock_process_file.call_count == 2
-        mock_process_file.assert_any_call(Path("/fake/input/S0142_file1.csv.gz"), ["BSC1", "BSC2"])
-        mock_process_file.assert_any_call(Path("/fake/input/S0142_file2.csv.gz"), ["BSC1", "BSC2"])
+        mock_process_file.assert_any_call(input_dir / "S0142_file1.csv.gz", ["BSC1", "BSC2"])
+        mock_process_file.assert_any_call(input_dir / "S0142_file2.csv.gz", ["BSC1", "BSC2"])
+
+    assert sorted(path.name for path in output_dir.glob("*.csv")) == [
+        "S0142_file1.csv_BSC1.csv",
+        "S0142_file2.csv_BSC1.csv",
+    ]
+    entries = manifest.Manifest(output_dir).entries
+    assert sorted(entries) == ["S0142_file1.csv.gz", "S0142_file2.csv.gz"]
+    assert entries["S0142_file1.csv.gz"]["parties"] == {"BSC1": len(load)}
+    assert entries["S0142_file1.csv.gz"]["outputs"] == ["S0142_file1.csv_BSC1.csv"]
+
+
+def write_S0142_gz(gold_csv: Path, output_path: Path, other_party: str = "OTHER") -> None:
+    """Rebuild an S0142 file from GOLD output, with an extra party section that isn't requested"""
+    gold = pd.read_csv(gold_csv, dtype=str)
+    settlement_date = "".join(reversed(gold["Settlement Date"].iloc[0].split("/")))
+    lines = ["AAA|S0142|", f"SRH|{settlement_date}|{gold['Settlement Run Type'].iloc[0]}|"]
+    for bsc, bsc_df in [*gold.groupby("BSC"), (other_party, gold.assign(BSC=other_party).head(3))]:
+        lines.append("|".join(["BPH"] + [""] * 7 + [bsc]) + "|")
+        for settlement_period, period_df in bsc_df.groupby("Settlement Period", sort=False):
+            lines.append(f"SP7|{settlement_period}|")
+            lines += ["|".join(["BP7", *row]) + "|" for row in period_df.iloc[:, 4:].fillna("").values]
+    lines.append("ZZZ|")
+    with gzip.open(output_path, "wt") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@pytest.mark.parametrize(
+    "gold_csv",
+    [data.register.S0142_20230330_SF_20230425121906_GOLD_CSV, data.register.S0142_20230331_SF_20230426191253_GOLD_CSV],
+)
+def test_process_file_matches_gold(gold_csv: Path, tmp_path: Path) -> None:
+    write_S0142_gz(gold_csv, tmp_path / "S0142.gz")
+    bsc_dfs = dict(processed_S0142.process_file(tmp_path / "S0142.gz", bsc_party_ids=["GOLD"]))
+    assert list(bsc_dfs) == ["GOLD"]
+    assert list(bsc_dfs["GOLD"].columns) == processed_S0142.BSC_COLUMNS
+
+    bsc_dfs["GOLD"].to_csv(tmp_path / "GOLD.csv", index=False)
+    pd.testing.assert_frame_equal(
+        processed_S0142.ProcessedS0142(tmp_path / "GOLD.csv").df,
+        processed_S0142.ProcessedS0142(gold_csv).df,
+    )
+
+    all_bsc_dfs = dict(processed_S0142.process_file(tmp_path / "S0142.gz", bsc_party_ids=["all!"]))
+    assert list(all_bsc_dfs) == ["GOLD", "OTHER"]
+    assert len(all_bsc_dfs["OTHER"]) == 3
+
+
+def test_process_directory_parallel(tmp_path: Path) -> None:
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    write_S0142_gz(data.register.S0142_20230330_SF_20230425121906_GOLD_CSV, input_dir / "S0142_20230330_SF_1.gz")
+    write_S0142_gz(data.register.S0142_20230331_SF_20230426191253_GOLD_CSV, input_dir / "S0142_20230331_SF_2.gz")
+    (input_dir / "S0142_20230401_SF_3.gz").write_bytes(b"not gzip")
+
+    with pytest.raises(ExceptionGroup) as excinfo:
+        processed_S0142.process_directory(input_dir, output_dir, bsc_party_ids=["all!"], workers=2)
+    assert len(excinfo.value.exceptions) == 1
+    assert str(input_dir / "S0142_20230401_SF_3.gz") in excinfo.value.exceptions[0].__notes__[0]
+    assert sorted(path.name for path in output_dir.glob("*.csv")) == [
+        "S0142_20230330_SF_1_GOLD.csv",
+        "S0142_20230330_SF_1_OTHER.csv",
+        "S0142_20230331_SF_2_GOLD.csv",
+        "S0142_20230331_SF_2_OTHER.csv",
+    ]
+    pd.testing.assert_frame_equal(
+        processed_S0142.ProcessedS0142(output_dir / "S0142_20230331_SF_2_GOLD.csv").df,
+        processed_S0142.ProcessedS0142(data.register.S0142_20230331_SF_20230426191253_GOLD_CSV).df,
+    )
+
+    with patch("ma.elexon.S0142.processed_S0142.process_file") as mock_process_file:
+        processed_S0142.process_directory(input_dir, output_dir, bsc_party_ids=["all!"], prefixes=["S0142_202303"])
+        mock_process_file.assert_not_called()  # all done already
+
+
+def test_process_directory_to_dataset(tmp_path: Path) -> None:
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    write_S0142_gz(data.register.S0142_20230330_SF_20230425121906_GOLD_CSV, input_dir / "S0142_20230330_SF_1.gz")
+
+    assert processed_S0142.process_directory(input_dir, output_dir, ["GOLD"], output_format="parquet") == []
+    pd.testing.assert_frame_equal(
+        dataset.read_processed(output_dir).df,
+        processed_S0142.ProcessedS0142(data.register.S0142_20230330_SF_20230425121906_GOLD_CSV).df,
+    )
+
+    with patch("ma.elexon.S0142.processed_S0142.process_file") as mock_process_file:
+        processed_S0142.process_directory(input_dir, output_dir, ["GOLD"], output_format="parquet")
+        mock_process_file.assert_not_called()  # done already
+
+
+def test_process_directory_records_manifest(tmp_path: Path) -> None:
+    input_dir, output_dir = tmp_path / "input", tmp_path / "output"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    write_S0142_gz(data.register.S0142_20230330_SF_20230425121906_GOLD_CSV, input_dir / "S0142_20230330_SF_1.gz")
+    (input_dir / "S0142_20230401_SF_3.gz").write_bytes(b"not gzip")
+
+    failed = processed_S0142.process_directory(input_dir, output_dir, bsc_party_ids=["GOLD"], raise_on_error=False)
+    assert failed == [input_dir / "S0142_20230401_SF_3.gz"]
+    entries = manifest.Manifest(output_dir).entries
+    assert list(entries) == ["S0142_20230330_SF_1.gz"]  # failures aren't recorded
+    entry = entries["S0142_20230330_SF_1.gz"]
+    assert entry["size"] == (input_dir / "S0142_20230330_SF_1.gz").stat().st_size
+    assert entry["checksum"] == manifest.file_checksum(input_dir / "S0142_20230330_SF_1.gz")
+    assert entry["settlement_date"] == "2023-03-30"
+    assert entry["settlement_run_type"] == "SF"
+    assert entry["parties"] == {"GOLD": 672}
+    assert entry["outputs"] == ["S0142_20230330_SF_1_GOLD.csv"]
+
+    # A rerun only processes new or changed files
+    write_S0142_gz(data.register.S0142_20230331_SF_20230426191253_GOLD_CSV, input_dir / "S0142_20230331_SF_2.gz")
+    with patch("ma.elexon.S0142.processed_S0142.process_file", return_value=[]) as mock_process_file:
+        processed_S0142.process_directory(input_dir, output_dir, bsc_party_ids=["GOLD"])
+    assert sorted(call.args[0].name for call in mock_process_file.call_args_list) == [
+        "S0142_20230331_SF_2.gz",
+        "S0142_20230401_SF_3.gz",
+    ]
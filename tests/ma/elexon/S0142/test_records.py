@@ -0,0 +1,70 @@
+import gzip
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from ma.elexon.S0142 import records
+from ma.elexon.S0142.processed_S0142 import BP7, ProcessedS0142
+
+LINES = [
+    "AAA|S0142|",
+    "SRH|20230330|SF|",
+    "SYS|1.5|",
+    "BPH||||||||GOLD|",
+    "SP7|1|",
+    "BP7|2__AGESL000|1.0|0.0|0.0|0.0|0.0|0.0|-1.5|0.0|0.0|0.98|0.99|TU1|-1.5|0.0|0.0|0.0|",
+    "XYZ|a|",
+    "SP7|2|",
+    "BP7|2__AGESL000|1.0|0.0|0.0|0.0|0.0|0.0|-2.5|0.0|0.0|0.98|0.99|TU1|-2.5|0.0|0.0|0.0|",
+    "XYZ|b|",
+    "XYZ|c|",
+    "BPH||||||||OTHER|",
+    "SP7|1|",
+    "XYZ|d|",
+    "ZZZ|",
+]
+
+
+@pytest.fixture
+def registered(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(records.RECORD_HANDLERS, "XYZ", records.RecordHandler("XYZ", {1: "Value"}))
+    monkeypatch.setitem(
+        records.RECORD_HANDLERS, "SYS", records.RecordHandler("SYS", {1: "Price"}, {"Price": float}, per_period=False)
+    )
+
+
+def test_extract_several_record_types(registered: None, tmp_path: Path) -> None:
+    with gzip.open(tmp_path / "S0142.gz", "wt") as f:
+        f.write("\n".join(LINES) + "\n")
+
+    with patch("gzip.open", wraps=gzip.open) as gzip_open:
+        extracted = list(records.extract_file(tmp_path / "S0142.gz", ["BP7", "XYZ", "SYS"], ["GOLD"]))
+    assert gzip_open.call_count == 1
+    assert [(record_type, bsc) for record_type, bsc, _ in extracted] == [
+        ("SYS", None),
+        ("BP7", "GOLD"),
+        ("XYZ", "GOLD"),
+    ]
+
+    system, bp7, xyz = (df for _, _, df in extracted)
+    assert list(system.columns) == ["BSC", "Settlement Date", "Settlement Run Type", "Price"]
+    assert system["Price"].tolist() == [1.5]
+    assert xyz["Value"].tolist() == ["a", "b", "c"]
+    assert xyz["Settlement Period"].tolist() == [1, 2, 2]
+    assert set(xyz["Settlement Date"]) == {"30/03/2023"}
+
+    assert isinstance(bp7, ProcessedS0142)  # the BP7 handler's asset
+    assert bp7["bm_unit_metered_volume_mwh"].tolist() == [-1.5, -2.5]
+    pd.testing.assert_series_equal(
+        bp7.df["settlement_period"], pd.Series([1, 2], name="settlement_period"), check_dtype=False
+    )
+
+    (untyped,) = [df for _, _, df in records.extract_file(tmp_path / "S0142.gz", ["BP7"], ["GOLD"], False)]
+    assert list(untyped.columns) == BP7.output_columns
+
+
+def test_extract_all_parties(registered: None) -> None:
+    extracted = records.extract([line.split("|") for line in LINES], ["XYZ"], ["all!"])
+    assert [(bsc, df["Value"].tolist()) for _, bsc, df in extracted] == [("GOLD", ["a", "b", "c"]), ("OTHER", ["d"])]
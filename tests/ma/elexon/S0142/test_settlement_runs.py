@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from ma.elexon.S0142 import settlement_runs
+
+FILES = [
+    Path("GOLD/S0142_20230330_SF_20230425121906_GOLD.csv"),
+    Path("GOLD/S0142_20230330_R1_20230601120000_GOLD.csv"),
+    Path("GOLD/S0142_20230330_R1_20230602120000_GOLD.csv"),  # reissued
+    Path("GOLD/S0142_20230331_SF_20230426191253_GOLD.csv"),
+    Path("GOLD/S0142_20230401_II_20230402120000_GOLD.csv"),
+]
+
+
+def test_index_files() -> None:
+    index = settlement_runs.index_files(
+        FILES + [Path("root/settlement_month=2023-03/bsc=GOLD/x/S0142_20230330_SF_.parquet")]
+    )
+    assert list(index["settlement_run_type"]) == ["SF", "R1", "R1", "SF", "II", "SF"]
+    assert list(index["bsc"]) == ["GOLD"] * 6
+    assert index["settlement_date"].iloc[0] == pd.Timestamp("2023-03-30")
+
+    assert list(settlement_runs.index_files(FILES + [Path("GOLD/README.md")])["path"]) == FILES
+    with pytest.raises(ValueError):
+        settlement_runs.index_files([Path("GOLD/S0142_20230330_XX_20230425121906_GOLD.csv")])
+
+
+def test_resolve() -> None:
+    assert settlement_runs.authoritative_files(FILES) == [FILES[2], FILES[3], FILES[4]]
+    assert settlement_runs.authoritative_files(FILES, "SF") == [FILES[0], FILES[3]]
+    assert list(settlement_runs.superseded(settlement_runs.index_files(FILES))["path"]) == FILES[:2]
+    with pytest.raises(ValueError):
+        settlement_runs.authoritative_files(FILES, "XX")
+
+
+def test_resolve_parties_in_one_directory() -> None:
+    files = [
+        Path("csv/S0142_20230330_SF_20230425121906_MERCURY.csv"),
+        Path("csv/S0142_20230330_SF_20230425121906_PURE.csv"),
+        Path("csv/S0142_20230330_R1_20230601120000_MERCURY.csv"),
+        Path("csv/S0142_20230330_R1_20230601120000_PURE.csv"),
+        Path("csv/S0142_20230331_SF_20230426191253_PURE.csv"),
+    ]
+    assert list(settlement_runs.index_files(files)["bsc"]) == ["MERCURY", "PURE", "MERCURY", "PURE", "PURE"]
+    assert settlement_runs.authoritative_files(files) == [files[2], files[3], files[4]]
+    assert settlement_runs.authoritative_files(files, "SF") == [files[0], files[1], files[4]]
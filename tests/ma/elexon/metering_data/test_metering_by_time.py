@@ -1,10 +1,18 @@
+from pathlib import Path
+
 import pandas as pd
 import pytest
 from pytest import approx
 
 import data.register
-from ma.elexon.metering_data.metering_data_by_time import MeteringDataDaily, MeteringDataMonthly
+from ma.elexon import settlement_calendar
+from ma.elexon.metering_data.metering_data_by_time import (
+    MeteringDataDaily,
+    MeteringDataHalfHourly,
+    MeteringDataMonthly,
+)
 from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+from ma.utils.enums import TemporalGranularity
 
 
 def test_transforms() -> None:
@@ -74,3 +82,63 @@ def test_transform_assert_no_duplicate_timestamps() -> None:
     day_2 = MeteringDataDaily(day_1.df)
     with pytest.raises(AssertionError, match="duplicate"):
         MeteringDataDaily.aggregate_to_monthly([day_1, day_2])
+
+
+def get_half_hourly(path: Path) -> MeteringDataHalfHourly:
+    return ProcessedS0142(path).transform_to_half_hourly_by_bmu().transform_to_half_hourly()
+
+
+def test_transform_to_granularity_matches_single_days() -> None:
+    day_1 = get_half_hourly(data.register.S0142_20230330_SF_20230425121906_GOLD_CSV)
+    day_2 = get_half_hourly(data.register.S0142_20230331_SF_20230426191253_GOLD_CSV)
+    both_days = MeteringDataHalfHourly(pd.concat([day_1.df, day_2.df]))
+
+    daily = both_days.transform_to_granularity(TemporalGranularity.DAILY)
+    pd.testing.assert_frame_equal(daily.df, pd.concat([day_1.transform_to_daily().df, day_2.transform_to_daily().df]))
+    pd.testing.assert_frame_equal(
+        both_days.transform_to_granularity(TemporalGranularity.MONTHLY).df,
+        MeteringDataDaily.aggregate_to_monthly([day_1.transform_to_daily(), day_2.transform_to_daily()]).df,
+    )
+
+
+def get_year_half_hourly(year: int) -> pd.DataFrame:
+    calendar = settlement_calendar.settlement_calendar()
+    calendar = calendar[calendar["settlement_date"].dt.year == year]
+    columns = list(MeteringDataHalfHourly.compiled_schema().columns)
+    df = pd.DataFrame(1.0, index=pd.Index(calendar["settlement_datetime"]), columns=columns)
+    df["bmu_count"] = 1
+    return df
+
+
+def test_transform_year_to_granularity() -> None:
+    df = get_year_half_hourly(2023)
+    df = df.drop(df.index[100])  # a period of 2023-01-03
+    half_hourly = MeteringDataHalfHourly(df)
+
+    daily = half_hourly.transform_to_granularity(TemporalGranularity.DAILY)
+    assert len(daily.df) == 365
+    clock_changes = daily.df.loc[[pd.Timestamp("2023-03-26"), pd.Timestamp("2023-10-29")]]
+    assert list(clock_changes["settlement_period_count"]) == [46, 50]
+    assert list(clock_changes["expected_settlement_period_count"]) == [46, 50]
+    assert daily["settlement_period_count"].sum() == len(df)
+    incomplete = daily.df[daily["settlement_period_count"] < daily["expected_settlement_period_count"]]
+    assert list(incomplete.index) == [pd.Timestamp("2023-01-03")]
+
+    monthly = half_hourly.transform_to_granularity(TemporalGranularity.MONTHLY)
+    assert list(monthly.df.index) == list(pd.date_range("2023-01-01", periods=12, freq="MS"))
+    assert list(monthly["day_count"]) == [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    assert list(monthly["incomplete_day_count"]) == [1] + [0] * 11
+    assert monthly["bm_unit_metered_volume_mwh"].sum() == approx(len(df))
+
+    yearly = half_hourly.transform_to_granularity(TemporalGranularity.YEARLY)
+    assert list(yearly.df.index) == [pd.Timestamp("2023-01-01")]
+    assert yearly["month_count"].iloc[0] == 12
+    assert yearly["incomplete_day_count"].iloc[0] == 1
+    assert yearly["bm_unit_metered_volume_mwh"].iloc[0] == approx(len(df))
+    pd.testing.assert_frame_equal(yearly.df, MeteringDataMonthly.aggregate_to_yearly([monthly]).df)
+
+
+def test_transform_to_granularity_assert_no_duplicate_timestamps() -> None:
+    df = get_year_half_hourly(2023).iloc[:48]
+    with pytest.raises(AssertionError, match="duplicate"):
+        MeteringDataHalfHourly(pd.concat([df, df])).transform_to_granularity(TemporalGranularity.DAILY)
@@ -1,3 +1,7 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
 from pytest import approx
 
 import data.register
@@ -39,3 +43,52 @@ def test_transform_to_half_hourly() -> None:
     assert half_hourly["bm_unit_metered_volume_mwh"].sum() == approx(-3417.849)
     assert half_hourly["bm_unit_metered_volume_+ve_mwh"].sum() == approx(0)
     assert half_hourly["bm_unit_metered_volume_-ve_mwh"].sum() == approx(-3417.849)
+
+
+def test_parquet_round_trip(tmp_path: Path) -> None:
+    half_hourly_by_bmu = get_half_hourly_by_bmu()
+    half_hourly_by_bmu.write(tmp_path / "half_hourly_by_bmu.parquet")
+    from_parquet = MeteringDataHalfHourlyByBmu(tmp_path / "half_hourly_by_bmu.parquet")
+    pd.testing.assert_frame_equal(half_hourly_by_bmu.df, from_parquet.df)
+
+
+def sorted_long(df: pd.DataFrame) -> pd.DataFrame:
+    return df.reset_index().sort_values(["settlement_datetime", "bm_unit_id"], kind="stable").reset_index(drop=True)
+
+
+def test_dense_round_trip() -> None:
+    half_hourly_by_bmu = get_half_hourly_by_bmu()
+    df = half_hourly_by_bmu.df.iloc[3:]  # a BM unit without a row in the first period
+    dense = MeteringDataHalfHourlyByBmu(df).to_dense()
+    assert dense.present.shape == (14, 48)
+    assert dense.measures["bm_unit_metered_volume_mwh"].shape == (14, 48)
+    assert (~dense.present).sum() == 3
+    pd.testing.assert_frame_equal(sorted_long(dense.to_long().df), sorted_long(df))
+
+
+def test_dense_select_and_sum() -> None:
+    half_hourly_by_bmu = get_half_hourly_by_bmu()
+    dense = half_hourly_by_bmu.to_dense()
+
+    selected = dense.select(bm_regex="2__[AB]GESL000")
+    assert list(selected.bm_unit_ids) == ["2__AGESL000", "2__BGESL000"]
+    pd.testing.assert_frame_equal(
+        sorted_long(selected.to_long().df),
+        sorted_long(half_hourly_by_bmu.filter(bm_regex="2__[AB]GESL000").df),
+        check_categorical=False,  # filter() keeps the categories of the BM units it drops
+    )
+    assert list(dense.select(bm_ids=["2__AGESL000"]).bm_unit_ids) == ["2__AGESL000"]
+
+    window = dense.select(start=pd.Timestamp("2023-03-30 00:00"), end=pd.Timestamp("2023-03-30 01:00"))
+    assert list(window.settlement_datetimes) == [pd.Timestamp("2023-03-30 00:00"), pd.Timestamp("2023-03-30 00:30")]
+
+    assert dense.sum_bmus("bm_unit_metered_volume_mwh").sum() == approx(-3417.849)
+    pd.testing.assert_frame_equal(
+        dense.transform_to_half_hourly().df, half_hourly_by_bmu.transform_to_half_hourly().df, check_names=False
+    )
+
+
+def test_dense_rejects_duplicate_rows() -> None:
+    df = get_half_hourly_by_bmu().df
+    with pytest.raises(ValueError, match="at most one row"):
+        MeteringDataHalfHourlyByBmu(pd.concat([df, df.iloc[:1]])).to_dense()
@@ -0,0 +1,104 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest import approx
+
+import data.register
+from ma.elexon import settlement_calendar
+from ma.elexon.metering_data.metering_data_by_time import MeteringDataDaily, MeteringDataHalfHourly
+from ma.elexon.metering_data.running_aggregates import RunningAggregates
+from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+from ma.utils.enums import TemporalGranularity
+
+
+def get_half_hourly(year: int) -> MeteringDataHalfHourly:
+    calendar = settlement_calendar.settlement_calendar()
+    calendar = calendar[calendar["settlement_date"].dt.year == year]
+    df = pd.DataFrame(
+        1.0,
+        index=pd.Index(calendar["settlement_datetime"]),
+        columns=list(MeteringDataHalfHourly.compiled_schema().columns),
+    )
+    df["bmu_count"] = 1
+    return MeteringDataHalfHourly(df.drop(df.index[100]))  # a period of 2023-01-03
+
+
+def restated(daily: MeteringDataDaily, day: str, factor: float) -> MeteringDataDaily:
+    df = daily.df.loc[[pd.Timestamp(day)]]
+    df["bm_unit_metered_volume_mwh"] *= factor
+    return MeteringDataDaily(df)
+
+
+def test_incremental_updates_match_rollup() -> None:
+    half_hourly = get_half_hourly(2023)
+    daily = half_hourly.transform_to_granularity(TemporalGranularity.DAILY).df
+    assert isinstance(daily.index, pd.DatetimeIndex)  # appease mypy
+    aggregates = RunningAggregates()
+    for month in range(1, 13):  # a month at a time
+        in_month = daily[daily.index.month == month]
+        assert aggregates.update("GOLD", MeteringDataDaily(in_month), "SF") == len(in_month)
+
+    monthly = half_hourly.transform_to_granularity(TemporalGranularity.MONTHLY)
+    pd.testing.assert_frame_equal(aggregates.monthly("GOLD").df, monthly.df, check_freq=False)
+    pd.testing.assert_frame_equal(
+        aggregates.yearly("GOLD").df,
+        half_hourly.transform_to_granularity(TemporalGranularity.YEARLY).df,
+        check_freq=False,
+    )
+    january = aggregates.month("GOLD", pd.Timestamp("2023-01-01"))
+    assert january["day_count"] == 31
+    assert january["incomplete_day_count"] == 1
+    assert aggregates.year("GOLD", pd.Timestamp("2023-01-01"))["month_count"] == 12
+    assert aggregates.bscs == ["GOLD"]
+    with pytest.raises(KeyError):
+        aggregates.month("GOLD", pd.Timestamp("2024-01-01"))
+
+
+def test_restated_days() -> None:
+    daily = get_half_hourly(2023).transform_to_granularity(TemporalGranularity.DAILY)
+    aggregates = RunningAggregates()
+    aggregates.update("GOLD", daily, "SF")
+    march = aggregates.month("GOLD", pd.Timestamp("2023-03-01"))["bm_unit_metered_volume_mwh"]
+    year = aggregates.year("GOLD", pd.Timestamp("2023-01-01"))["bm_unit_metered_volume_mwh"]
+
+    assert aggregates.update("GOLD", restated(daily, "2023-03-26", 3.0), "R1") == 1  # 46 periods, tripled
+    assert aggregates.month("GOLD", pd.Timestamp("2023-03-01"))["bm_unit_metered_volume_mwh"] == approx(march + 92)
+    assert aggregates.year("GOLD", pd.Timestamp("2023-01-01"))["bm_unit_metered_volume_mwh"] == approx(year + 92)
+    assert aggregates.month("GOLD", pd.Timestamp("2023-03-01"))["day_count"] == 31
+
+    assert aggregates.update("GOLD", restated(daily, "2023-03-26", 2.0), "SF") == 0  # superseded by R1
+    assert aggregates.update("GOLD", restated(daily, "2023-03-26", 2.0), "R1") == 1  # a reissue of R1
+    assert aggregates.month("GOLD", pd.Timestamp("2023-03-01"))["bm_unit_metered_volume_mwh"] == approx(march + 46)
+    assert aggregates.month("GOLD", pd.Timestamp("2023-04-01"))["bm_unit_metered_volume_mwh"] == approx(30 * 48)
+
+
+def test_write_and_read(tmp_path: Path) -> None:
+    daily = get_half_hourly(2023).transform_to_granularity(TemporalGranularity.DAILY)
+    aggregates = RunningAggregates()
+    aggregates.update("GOLD", daily, "SF")
+    aggregates.update("SILVER", MeteringDataDaily(daily.df.iloc[:40]))
+    aggregates.write(tmp_path / "aggregates.parquet")
+
+    read = RunningAggregates.read(tmp_path / "aggregates.parquet")
+    for bsc in ["GOLD", "SILVER"]:
+        pd.testing.assert_frame_equal(read.monthly(bsc).df, aggregates.monthly(bsc).df)
+        pd.testing.assert_frame_equal(read.yearly(bsc).df, aggregates.yearly(bsc).df)
+    assert read.update("GOLD", restated(daily, "2023-03-26", 2.0), "SF") == 1
+    assert read.update("GOLD", restated(daily, "2023-03-26", 2.0), "II") == 0
+
+
+def test_update_from_processed() -> None:
+    aggregates = RunningAggregates()
+    dailies = []
+    for path in [
+        data.register.S0142_20230330_SF_20230425121906_GOLD_CSV,
+        data.register.S0142_20230331_SF_20230426191253_GOLD_CSV,
+    ]:
+        assert aggregates.update_from_processed(ProcessedS0142(path)) == 1
+        dailies.append(
+            ProcessedS0142(path).transform_to_half_hourly_by_bmu().transform_to_half_hourly().transform_to_daily()
+        )
+    pd.testing.assert_frame_equal(
+        aggregates.monthly(aggregates.bscs[0]).df, MeteringDataDaily.aggregate_to_monthly(dailies).df, check_freq=False
+    )
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data.register
+from ma.elexon import settlement_calendar
+from ma.elexon.S0142.processed_S0142 import ProcessedS0142
+
+
+def test_periods_in_day() -> None:
+    assert settlement_calendar.periods_in_day(pd.Timestamp("2023-03-26")) == 46  # clocks go forward
+    assert settlement_calendar.periods_in_day(pd.Timestamp("2023-03-27")) == 48
+    assert settlement_calendar.periods_in_day(pd.Timestamp("2023-10-29")) == 50  # clocks go back
+
+
+def test_settlement_datetimes() -> None:
+    dates = pd.DatetimeIndex(["2023-01-15", "2023-03-26", "2023-03-26", "2023-07-01", "2023-10-29", "2023-10-29"])
+    periods = [1, 2, 3, 1, 4, 50]
+    assert list(settlement_calendar.settlement_datetimes(dates, periods)) == list(
+        pd.DatetimeIndex(
+            [
+                "2023-01-15 00:00",
+                "2023-03-26 00:30",
+                "2023-03-26 01:00",  # 02:00 BST
+                "2023-06-30 23:00",  # midnight BST
+                "2023-10-29 00:30",  # the first 01:30 BST
+                "2023-10-29 23:30",
+            ]
+        ).to_numpy()
+    )
+
+    with pytest.raises(ValueError, match="out of range"):
+        settlement_calendar.settlement_datetimes(pd.DatetimeIndex(["2023-03-26"]), [47])
+    with pytest.raises(ValueError, match="must be in"):
+        settlement_calendar.settlement_datetimes(pd.DatetimeIndex(["1999-12-31"]), [1])
+
+
+def test_settlement_calendar() -> None:
+    calendar = settlement_calendar.settlement_calendar()
+    assert calendar["settlement_datetime"].is_monotonic_increasing
+    assert (calendar["settlement_datetime"].diff().dropna() == pd.Timedelta(minutes=30)).all()
+    day = calendar[calendar["settlement_date"] == pd.Timestamp("2023-10-29")]
+    assert list(day["settlement_period"]) == list(range(1, 51))
+    assert day["settlement_datetime_local"].iloc[0] == pd.Timestamp("2023-10-29 00:00", tz="Europe/London")
+    assert day["settlement_datetime_local"].iloc[-1] == pd.Timestamp("2023-10-29 23:30", tz="Europe/London")
+
+
+def test_half_hourly_by_bmu_in_utc() -> None:
+    half_hourly_by_bmu = ProcessedS0142(
+        data.register.S0142_20230330_SF_20230425121906_GOLD_CSV
+    ).transform_to_half_hourly_by_bmu()
+    index = half_hourly_by_bmu.df.index
+    assert index.min() == pd.Timestamp("2023-03-29 23:00")  # midnight BST
+    assert index.max() == pd.Timestamp("2023-03-30 22:30")
+    assert set(half_hourly_by_bmu["settlement_date"]) == {"30/03/2023"}
+
+    daily = half_hourly_by_bmu.transform_to_half_hourly().transform_to_daily()
+    assert list(daily.df.index) == [pd.Timestamp("2023-03-30")]
+    assert np.all(settlement_calendar.to_local(index).normalize() == pd.Timestamp("2023-03-30"))
@@ -19,3 +19,14 @@ def test_groupby_tech_and_month() -> None:
     expected_gas_sum = 8503211.0  # Sum of gas column subset in Excel, divided by 2 to convert to MWH as load() does
     jan_2024_gas = grouped.at[pd.Timestamp("2023-03-01"), "gas_mwh"]
     assert jan_2024_gas == approx(expected_gas_sum)
+
+
+def test_grid_mix_raw_reads_kept_columns_only() -> None:
+    class StrictGridMixRaw(GridMixRaw):
+        from_file_strict_audit = True
+
+    grid_mix = GridMixRaw(data.register.NESO_FUEL_CKAN_CSV_SUBSET_FEB2023_MAR2023)
+    grid_mix_audited = StrictGridMixRaw(data.register.NESO_FUEL_CKAN_CSV_SUBSET_FEB2023_MAR2023)
+    assert GridMixRaw._csv_options()["usecols"] == GridMixRaw._kept_positions()
+    assert "usecols" not in StrictGridMixRaw._csv_options()
+    pd.testing.assert_frame_equal(grid_mix.df, grid_mix_audited.df)
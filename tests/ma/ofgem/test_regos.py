@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import List, TypedDict
 
 import pandas as pd
@@ -194,3 +195,23 @@ def test_parse_output_period_EMPTY_DATAFRAME() -> None:
     regos = RegosRaw(get_regos_raw().df[:0])
     regos_df = RegosRaw.add_output_period_columns(regos.df[:0])
     assert set(["start_year_month", "end_year_month", "period_months"]) < set(regos_df.columns)
+
+
+def test_regos_processed_parquet_round_trip(tmp_path: Path) -> None:
+    regos = get_regos_processed()
+    regos.write(tmp_path / "regos_processed.parquet")
+    pd.testing.assert_frame_equal(regos.df, RegosProcessed(tmp_path / "regos_processed.parquet").df)
+
+
+def test_regos_raw_ingest_csv(tmp_path: Path) -> None:
+    regos = RegosRaw.ingest_csv(data.register.REGOS_APR2022_MAR2023_SUBSET, tmp_path / "regos.parquet", chunksize=50)
+    pd.testing.assert_frame_equal(regos.df, get_regos_raw().df)
+
+    drax = RegosRaw.ingest_csv(
+        data.register.REGOS_APR2022_MAR2023_SUBSET,
+        tmp_path / "drax.parquet",
+        chunksize=50,
+        row_filter=lambda df: df["station_name"] == "Drax Power Station (REGO)",
+    )
+    assert set(drax["station_name"]) == set(["Drax Power Station (REGO)"])
+    assert 0 < len(drax.df) < 327
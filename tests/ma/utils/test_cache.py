@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import data.register
+from ma.neso.grid_mix import GridMixProcessed, GridMixRaw
+from ma.ofgem.regos import RegosRaw
+from ma.utils.cache import TransformCache, get_transform_cache, transform_cache
+
+
+def get_grid_mix_raw() -> GridMixRaw:
+    return GridMixRaw(data.register.NESO_FUEL_CKAN_CSV_SUBSET_FEB2023_MAR2023)
+
+
+def test_cache_off_by_default() -> None:
+    assert get_transform_cache() is None
+
+
+def test_cache_hit(tmp_path: Path) -> None:
+    grid_mix_raw = get_grid_mix_raw()
+    with transform_cache(tmp_path) as cache:
+        computed = grid_mix_raw.transform_to_grid_mix_processed()
+        assert (cache.hits, cache.misses) == (0, 1)
+        cached = get_grid_mix_raw().transform_to_grid_mix_processed()
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    assert isinstance(cached, GridMixProcessed)
+    pd.testing.assert_frame_equal(computed.df, cached.df)
+    assert get_transform_cache() is None
+
+
+def test_cache_hit_restores_nulls(tmp_path: Path) -> None:
+    regos_raw = RegosRaw(data.register.REGOS_APR2022_MAR2023_SUBSET)
+    with transform_cache(tmp_path) as cache:
+        computed = regos_raw.transform_to_regos_processed()
+        cached = regos_raw.transform_to_regos_processed()
+        assert cache.hits == 1
+    assert computed.view.select_dtypes(object).isna().to_numpy().any()  # nulls in str columns
+    pd.testing.assert_frame_equal(computed.df, cached.df)
+
+
+def test_cache_incomplete_entries(tmp_path: Path) -> None:
+    grid_mix_raw = get_grid_mix_raw()
+    with transform_cache(tmp_path) as cache:
+        grid_mix_raw.transform_to_grid_mix_processed()
+        (key,) = [entry["key"] for entry in cache.entries()]
+        (tmp_path / f"{key}.parquet").unlink()  # as if interrupted between writing meta and data
+        grid_mix_raw.transform_to_grid_mix_processed()
+        assert (cache.hits, cache.misses) == (0, 2)
+        assert (tmp_path / f"{key}.parquet").exists()
+
+        (tmp_path / f"{key}.json").unlink()  # data without meta, as left by an older version
+        cache.max_bytes = cache.size_bytes() - 1
+        cache._evict()
+        assert not (tmp_path / f"{key}.parquet").exists()
+
+
+def test_cache_keyed_on_content_and_version(tmp_path: Path) -> None:
+    grid_mix_raw = get_grid_mix_raw()
+    with transform_cache(tmp_path) as cache:
+        grid_mix_raw.transform_to_grid_mix_processed()
+        GridMixRaw(grid_mix_raw.view.iloc[:10], _validated=True).transform_to_grid_mix_processed()
+        assert cache.misses == 2
+
+    with transform_cache(tmp_path) as cache:
+        cache.code_version = "other"
+        grid_mix_raw.transform_to_grid_mix_processed()
+        assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_cache_invalidate(tmp_path: Path) -> None:
+    with transform_cache(tmp_path) as cache:
+        get_grid_mix_raw().transform_to_grid_mix_processed()
+        RegosRaw(data.register.REGOS_APR2022_MAR2023_SUBSET).transform_to_regos_processed()
+        assert len(cache.entries()) == 2
+
+        assert cache.invalidate(method="GridMixRaw.transform_to_grid_mix_processed") == 1
+        assert [e["input_type"] for e in cache.entries()] == ["RegosRaw"]
+        assert cache.invalidate() == 1
+        assert cache.entries() == []
+
+
+def test_cache_lru_eviction(tmp_path: Path) -> None:
+    grid_mix_raw = get_grid_mix_raw()
+    with transform_cache(tmp_path) as cache:
+        grid_mix_raw.transform_to_grid_mix_processed()
+        RegosRaw(data.register.REGOS_APR2022_MAR2023_SUBSET).transform_to_regos_processed()
+        cache.max_bytes = cache.size_bytes()
+
+        grid_mix_raw.transform_to_grid_mix_processed()  # hit, so the REGOs entry is now least recently used
+        GridMixRaw(grid_mix_raw.view.iloc[:10], _validated=True).transform_to_grid_mix_processed()
+        assert sorted(e["input_type"] for e in cache.entries()) == ["GridMixRaw", "GridMixRaw"]
+        assert cache.size_bytes() <= cache.max_bytes
+
+
+def test_cache_from_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("MA_TRANSFORM_CACHE_DIR", str(tmp_path))
+    cache = get_transform_cache()
+    assert isinstance(cache, TransformCache)
+    assert cache.directory == tmp_path
@@ -1,3 +1,8 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
 from ma.utils.conf import get_code_version
 
 
@@ -5,3 +10,28 @@ def test_get_code_version() -> None:
     version = get_code_version()
     assert version is not None
     assert version != "unknown"
+    assert get_code_version() is version  # resolved once
+
+
+def test_import_has_no_side_effects(tmp_path: Path) -> None:
+    script = """
+import importlib, sys
+from pathlib import Path
+import ma
+
+root = Path(ma.__file__).parent.parent
+modules = [".".join(path.relative_to(root).with_suffix("").parts) for path in (root / "ma").rglob("*.py")]
+events = []
+sys.addaudithook(lambda event, args: events.append((event, args)))
+for module in modules:
+    importlib.import_module(module.removesuffix(".__init__"))
+side_effects = [
+    (event, args[0])
+    for event, args in events
+    if event.startswith("subprocess") or (event == "open" and str(args[0]).endswith(".env"))
+]
+assert not side_effects, side_effects
+"""
+    env = {k: v for k, v in os.environ.items() if k != "ELEXON_API_KEY"}
+    (tmp_path / ".env").write_text("ELEXON_API_KEY=from-dot-env\n")
+    subprocess.run([sys.executable, "-c", script], env=env, cwd=tmp_path, check=True)
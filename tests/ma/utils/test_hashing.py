@@ -0,0 +1,53 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pandera as pa
+
+from ma.utils.hashing import hash_dataframe
+from ma.utils.pandas import ColumnSchema as CS
+from ma.utils.pandas import DataFrameAsset
+
+DF = pd.DataFrame(
+    dict(
+        a=[1, 2, 3],
+        b=["x", None, "zz"],
+        c=[1.0, np.nan, -0.0],
+        d=pd.to_datetime(["2024-01-01"] * 3),
+    ),
+    index=pd.Index([1, 2, 3], name="i"),
+)
+
+
+def test_hash_is_stable() -> None:
+    # Fixed value: the hash must not change across processes, platforms or pandas versions
+    assert hash_dataframe(copy.deepcopy(DF)) == "d02a09ff8829f887"
+
+
+def test_hash_ignores_storage() -> None:
+    df = DF.astype(dict(a="int16", b="category"))
+    df["c"] = [1.0, None, 0.0]
+    assert hash_dataframe(df) == hash_dataframe(DF)
+    assert hash_dataframe(DF.iloc[1:]) == hash_dataframe(DF.iloc[1:].copy())
+
+
+def test_hash_depends_on_content() -> None:
+    hashes = {
+        hash_dataframe(DF),
+        hash_dataframe(DF.assign(a=[1, 2, 4])),
+        hash_dataframe(DF.assign(b=["x", "", "zz"])),
+        hash_dataframe(DF.assign(b=["xz", None, "z"])),
+        hash_dataframe(DF[["b", "a", "c", "d"]]),
+        hash_dataframe(DF.rename(columns=dict(a="e"))),
+        hash_dataframe(DF.set_axis([3, 2, 1], axis=0)),
+    }
+    assert len(hashes) == 7
+
+
+def test_asset_hash_memoized() -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    df = Asset(pd.DataFrame(dict(a=[1, 2], b=["x", "y"])))
+    assert df.content_hash is df.content_hash
+    assert df.metadata["hash"] == hash_dataframe(df.df)
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from pytest import approx
+
+import data.register
+from ma.elexon.bmus import Bmus
+from ma.neso.grid_mix import GridMixRaw
+from ma.ofgem.regos import RegosRaw
+from ma.utils.instrumentation import get_recorder, instrumentation, is_instrumented
+
+
+def test_instrumentation_off_by_default() -> None:
+    assert get_recorder() is None
+
+
+def test_instrumentation_records_calls(tmp_path: Path) -> None:
+    with instrumentation(tmp_path / "events.jsonl") as recorder:
+        GridMixRaw(data.register.NESO_FUEL_CKAN_CSV_SUBSET_FEB2023_MAR2023).transform_to_grid_mix_processed()
+    assert get_recorder() is None
+
+    events = {event["name"]: event for event in recorder.events}
+    assert list(events) == [
+        "GridMixRaw._read_from_file",
+        "GridMixRaw._init_from_dataframe",
+        "GridMixRaw.__init__",
+        "GridMixProcessed._init_from_dataframe",
+        "GridMixProcessed.__init__",
+        "GridMixRaw.transform_to_grid_mix_processed",
+    ]
+    transform = events["GridMixRaw.transform_to_grid_mix_processed"]
+    assert transform["kind"] == "transform"
+    assert transform["rows_in"] == transform["rows_out"] == events["GridMixRaw.__init__"]["rows_out"]
+    assert transform["validation_s"] == approx(events["GridMixProcessed._init_from_dataframe"]["wall_s"])
+    assert transform["compute_s"] == approx(transform["wall_s"] - transform["validation_s"])
+    assert transform["peak_bytes"] > 0
+    assert events["GridMixRaw._read_from_file"]["bytes_in"] > 0
+
+    lines = (tmp_path / "events.jsonl").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == recorder.events
+    assert recorder.summary().loc[("GridMixRaw.__init__", "init"), "calls"] == 1
+
+
+def test_instrumentation_deep_sizes() -> None:
+    bytes_out = []
+    for deep_sizes in (False, True):
+        with instrumentation(trace_memory=False, deep_sizes=deep_sizes) as recorder:
+            RegosRaw(data.register.REGOS_APR2022_MAR2023_SUBSET)
+        bytes_out.append(recorder.events[-1]["bytes_out"])
+    assert 0 < bytes_out[0] < bytes_out[1]  # str columns sized only when deep
+
+
+def test_instrumentation_wraps_overridden_readers() -> None:
+    assert is_instrumented(Bmus._read_from_file)
+    assert is_instrumented(GridMixRaw.transform_to_grid_mix_processed)
+
+
+def test_instrumentation_from_env(tmp_path: Path) -> None:
+    script = (
+        "import data.register; from ma.neso.grid_mix import GridMixRaw; "
+        "GridMixRaw(data.register.NESO_FUEL_CKAN_CSV_SUBSET_FEB2023_MAR2023)"
+    )
+    env = os.environ | dict(MA_INSTRUMENT=str(tmp_path / "events.jsonl"))
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
+    names = [json.loads(line)["name"] for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert names[-1] == "GridMixRaw.__init__"
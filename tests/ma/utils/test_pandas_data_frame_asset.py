@@ -1,16 +1,30 @@
 import copy
+import gc
+import json
+import weakref
 from pathlib import Path
+from typing import Iterator
 
+import numpy as np
 import pandas as pd
 import pandera as pa
+import pyarrow.parquet as pq
 import pytest
 
+from ma.utils.hashing import hash_dataframe
 from ma.utils.pandas import ColumnSchema as CS
 from ma.utils.pandas import DataFrameAsset
+from ma.utils.pandas import DateTimeEngine as DTE
 
 DF_RAW = pd.DataFrame(dict(a=["1"] * 5, b=["foo"] * 5))  # note 'a' is of type str
 
 
+@pytest.fixture(params=[True, False], ids=["copy_on_write", "no_copy_on_write"])
+def copy_on_write(request: pytest.FixtureRequest) -> Iterator[bool]:
+    with pd.option_context("mode.copy_on_write", request.param):
+        yield request.param
+
+
 def test_schema_typed() -> None:
     class Asset(DataFrameAsset):
         schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
@@ -203,3 +217,286 @@ def test_derived_schema() -> None:
     # Assert that col_a is still an int for original assets
     df_original = Asset(copy.deepcopy(DF_RAW))
     assert pd.api.types.is_integer_dtype(df_original["col_a"])
+
+
+def test_view_zero_copy(copy_on_write: bool) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    df = Asset(copy.deepcopy(DF_RAW))
+    assert np.shares_memory(df.view["col_a"].to_numpy(), df["col_a"].to_numpy()) == copy_on_write
+    assert not np.shares_memory(df.df["col_a"].to_numpy(), df["col_a"].to_numpy())
+
+
+def test_view_writes_do_not_reach_asset(copy_on_write: bool) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Index(str)), col_b=CS(check=pa.Column(int)))
+
+    df_raw = copy.deepcopy(DF_RAW)
+    df_raw.set_index("b", drop=True, inplace=True)
+    df = Asset(df_raw)
+
+    view = df.view
+    view.iloc[0, 0] = 100
+    view["col_b"] += 1
+    assert view["col_b"].iloc[0] == 101
+    view["col_b"] = view["col_b"] * 2
+    view["col_c"] = 1
+    view.index.name = "renamed"
+    assert (df["col_b"] == 1).all()
+    assert list(df.df.columns) == ["col_b"]
+    assert df.df.index.name == "col_a"
+
+
+def test_input_writes_do_not_reach_asset(copy_on_write: bool) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    df_raw = pd.DataFrame(dict(a=[1] * 5, b=["foo"] * 5))  # already of the schema's dtypes
+    df = Asset(df_raw)
+    df_raw.iloc[0, 0] = 100
+    assert (df["col_a"] == 1).all()
+
+
+def test_view_read_apis() -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    view = Asset(copy.deepcopy(DF_RAW)).view
+    assert view.memory_usage(deep=True).sum() > view.memory_usage(deep=False).sum()  # sizes object columns
+    assert view.groupby("col_b")["col_a"].sum().to_dict() == {"foo": 5}
+    assert len(view.merge(view, on="col_b")) == 25
+    assert view.to_numpy().shape == (5, 2)
+    assert view["col_a"].to_numpy().sum() == 5
+
+
+def test_view_as_input_is_not_copied() -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    df = Asset(copy.deepcopy(DF_RAW))
+    df_from_view = Asset(df.view)
+    pd.testing.assert_frame_equal(df.df, df_from_view.df)
+
+
+def test_compiled_schema_cached() -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    df_1 = Asset(copy.deepcopy(DF_RAW))
+    df_2 = Asset(copy.deepcopy(DF_RAW))
+    assert df_1.pandera_schema is df_2.pandera_schema
+    assert Asset.compiled_schema() is Asset.compiled_schema()
+
+    Asset.schema = dict(col_a=CS(check=pa.Column(str)), col_b=CS(check=pa.Column(str)))
+    assert pd.api.types.is_object_dtype(Asset(copy.deepcopy(DF_RAW))["col_a"])
+
+
+def test_compiled_schema_does_not_keep_class_alive() -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    Asset(copy.deepcopy(DF_RAW))
+    asset_class = weakref.ref(Asset)
+    del Asset
+    gc.collect()
+    assert asset_class() is None
+
+
+def test_validated_fast_path(copy_on_write: bool) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(
+            col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)), col_c=CS(check=pa.Column(), keep=False)
+        )
+
+    df = Asset(copy.deepcopy(DF_RAW).assign(c="dropped"))
+    view = df.view
+    sliced = Asset(view.iloc[1:3], _validated=True)
+    assert len(sliced.df) == 2
+    assert list(sliced.df.columns) == ["col_a", "col_b"]
+    assert np.shares_memory(sliced["col_a"].to_numpy(), df["col_a"].to_numpy()) == copy_on_write
+    sliced_view = sliced.view
+    sliced_view.iloc[0, 0] = 200
+    assert (df["col_a"] == 1).all()
+
+
+def test_validated_fast_path_checks_columns_and_dtypes() -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    df = Asset(copy.deepcopy(DF_RAW))
+    with pytest.raises(AssertionError, match="columns don't match schema"):
+        Asset(df.view[["col_b", "col_a"]], _validated=True)
+    with pytest.raises(AssertionError, match="Column col_a has dtype float64"):
+        Asset(df.df.astype(dict(col_a=float)), _validated=True)
+
+
+def test_write_and_read_parquet(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(
+            col_a=CS(check=pa.Column(int)),
+            col_b=CS(check=pa.Column(str), keep=False),
+            col_c=CS(check=pa.Index(DTE(dayfirst=True))),
+        )
+
+    df_raw = copy.deepcopy(DF_RAW).assign(c=["01/02/2024", "02/02/2024", "03/02/2024", "04/02/2024", "05/02/2024"])
+    df = Asset(df_raw.set_index("c"))
+    df.write(tmp_path / "asset.parquet")
+
+    df_from_parquet = Asset(tmp_path / "asset.parquet")
+    pd.testing.assert_frame_equal(df.df, df_from_parquet.df)
+    assert df_from_parquet.df.index[1] == pd.Timestamp("2024-02-02")
+
+
+def test_parquet_metadata(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str, nullable=True), dtype="category"))
+
+    Asset(copy.deepcopy(DF_RAW).assign(b=["foo", None, "foo", "bar", "foo"])).write(tmp_path / "asset.parquet")
+    metadata = json.loads(pq.read_schema(tmp_path / "asset.parquet").metadata[b"ma"])
+    assert metadata["type"] == f"{__name__}.test_parquet_metadata.<locals>.Asset"
+    assert metadata["schema"]["col_b"] == dict(check="str", index=False, keep=True, dtype="category")
+
+    df = Asset(tmp_path / "asset.parquet")
+    assert df._read_from_parquet(tmp_path / "asset.parquet")[1]  # needs no coercion
+
+    Asset.schema = dict(col_a=CS(check=pa.Column(float)), col_b=CS(check=pa.Column(str, nullable=True)))
+    assert not df._read_from_parquet(tmp_path / "asset.parquet")[1]  # written with another schema
+    df = Asset(tmp_path / "asset.parquet")
+    assert pd.api.types.is_float_dtype(df["col_a"])
+    assert df["col_b"].isna().sum() == 1
+
+
+def test_read_parquet_wrong_asset_type(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    class OtherAsset(Asset):
+        pass
+
+    Asset(copy.deepcopy(DF_RAW)).write(tmp_path / "asset.parquet")
+    with pytest.raises(ValueError, match=r"holds a .*\.Asset, not a .*\.OtherAsset"):
+        OtherAsset(tmp_path / "asset.parquet")
+
+
+def test_read_parquet_written_elsewhere(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    copy.deepcopy(DF_RAW).to_parquet(tmp_path / "raw.parquet")
+    df = Asset(tmp_path / "raw.parquet")
+    assert pd.api.types.is_integer_dtype(df["col_a"])
+
+
+def test_lazy_loads_on_first_access(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+        from_file_with_index = False
+
+    DF_RAW.to_csv(tmp_path / "asset.csv", index=False, header=False)
+    df = Asset(tmp_path / "asset.csv", lazy=True)
+    assert not df.is_loaded
+    assert list(df["col_a"]) == [1] * 5
+    assert df.is_loaded
+
+
+def test_lazy_raises_if_file_changed(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+        from_file_with_index = False
+
+    DF_RAW.to_csv(tmp_path / "asset.csv", index=False, header=False)
+    df = Asset(tmp_path / "asset.csv", lazy=True)
+    DF_RAW.iloc[:2].to_csv(tmp_path / "asset.csv", index=False, header=False)
+    with pytest.raises(RuntimeError, match="has changed"):
+        df.view
+
+
+def test_lazy_metadata_from_sidecar(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+
+    df = Asset(copy.deepcopy(DF_RAW))
+    df.write(tmp_path / "asset.parquet", with_sidecar=True)
+    df_lazy = Asset(tmp_path / "asset.parquet", lazy=True)
+    assert df_lazy.metadata == df.metadata
+    assert df_lazy.content_hash == df.content_hash
+    assert not df_lazy.is_loaded
+
+    df.write(tmp_path / "asset.parquet")  # rewritten without updating the sidecar, so it's stale
+    df_lazy = Asset(tmp_path / "asset.parquet", lazy=True)
+    assert df_lazy.metadata["rows"] == "5"
+    assert df_lazy.is_loaded
+
+
+def test_ingest_csv(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str), keep=False))
+        from_file_with_index = False
+
+    DF_RAW.assign(a=range(5)).to_csv(tmp_path / "asset.csv", index=False, header=False)
+    df = Asset.ingest_csv(
+        tmp_path / "asset.csv", tmp_path / "asset.parquet", chunksize=2, row_filter=lambda df: df["col_a"] != 2
+    )
+    assert not df.is_loaded
+    assert list(df.df.columns) == ["col_a"]
+    assert list(df["col_a"]) == [0, 1, 3, 4]
+    assert not (tmp_path / ".asset.parquet.tmp").exists()
+
+
+def test_ingest_csv_category_null_in_first_chunk(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str, nullable=True), dtype="category"))
+        from_file_with_index = False
+
+    pd.DataFrame(dict(a=range(5), b=[None, None, "x", "y", "x"])).to_csv(
+        tmp_path / "asset.csv", index=False, header=False
+    )
+    df = Asset.ingest_csv(tmp_path / "asset.csv", tmp_path / "asset.parquet", chunksize=2)
+    assert list(df["col_b"].astype(object).fillna("null")) == ["null", "null", "x", "y", "x"]
+
+
+def test_ingest_csv_read_whole(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(str)))
+        from_file_with_index = False
+
+        def _read_from_file(self, filepath: Path) -> pd.DataFrame:
+            return pd.read_csv(filepath, header=None).iloc[::-1]
+
+    DF_RAW.assign(a=range(5)).to_csv(tmp_path / "asset.csv", index=False, header=False)
+    df = Asset.ingest_csv(tmp_path / "asset.csv", tmp_path / "asset.parquet", row_filter=lambda df: df["col_a"] != 2)
+    assert list(df["col_a"]) == [4, 3, 1, 0]
+    assert not (tmp_path / ".asset.parquet.tmp").exists()
+
+
+def test_storage_dtypes(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int), dtype="int16"), col_b=CS(check=pa.Column(str), dtype="category"))
+
+    df = Asset(copy.deepcopy(DF_RAW))
+    assert df["col_a"].dtype == "int16"
+    assert isinstance(df["col_b"].dtype, pd.CategoricalDtype)
+    assert df.content_hash == hash_dataframe(df.view.astype(dict(col_a=int, col_b=str)))  # storage doesn't change it
+
+    Asset(df.view.iloc[1:3], _validated=True)
+    with pytest.raises(AssertionError, match="Column col_b has dtype object, schema expects category"):
+        Asset(df.view.astype(dict(col_b=str)), _validated=True)
+
+    df.write(tmp_path / "asset.parquet")
+    pd.testing.assert_frame_equal(Asset(tmp_path / "asset.parquet").df, df.df)
+
+
+def test_from_file_reads_kept_columns_only(tmp_path: Path) -> None:
+    class Asset(DataFrameAsset):
+        schema = dict(col_a=CS(check=pa.Column(int)), col_b=CS(check=pa.Column(int), keep=False))
+        from_file_with_index = False
+
+    class AuditedAsset(Asset):
+        from_file_strict_audit = True
+
+    DF_RAW.to_csv(tmp_path / "asset.csv", index=False, header=False)  # col_b holds "foo", which isn't an int
+    df = Asset(tmp_path / "asset.csv")
+    assert list(df.df.columns) == ["col_a"]
+    with pytest.raises(pa.errors.SchemaError, match="col_b"):
+        AuditedAsset(tmp_path / "asset.csv")